@@ -1,129 +1,182 @@
 
+import os
+from datetime import datetime, timedelta, timezone
+
 import streamlit as st
 import pandas as pd
-import importlib
+
+import metrics
+import monday_to_df
+from refresher import BackgroundRefresher
+from report import build_table
 
 
 st.set_page_config(page_title="Regional Revenue Snapshot", layout="wide")
 st.title("Regional Revenue Snapshot")
 
-# Add a Run / Refresh button
-col1, col2 = st.columns([1, 8])
-with col1:
-    if st.button("🔄 Refresh Data"):
-        st.cache_data.clear()   # clear any cached results
-        importlib.reload(__import__("monday_to_df"))
-        st.rerun()
+# Rebuild the snapshot in the background every REGION_REV_REFRESH_SECONDS
+# (0 = only when the button is clicked). Sessions keep reading the last good
+# snapshot meanwhile and pick up the new version once it has been swapped in.
+REFRESH_SECONDS = float(os.getenv("REGION_REV_REFRESH_SECONDS", "1800"))
+VERSION_POLL_SECONDS = 30
 
-from monday_to_df import region_rev_breakdown, region_balances
 
-st.set_page_config(page_title="Regional Revenue Snapshot", layout="wide")
+@st.cache_resource(show_spinner=False)
+def background_refresher() -> BackgroundRefresher:
+    # One per server process, shared by every session
+    return BackgroundRefresher(monday_to_df.refresh_snapshot, REFRESH_SECONDS).start()
 
-st.title("Regional Revenue Snapshot")
 
-REGION_ORDER = [
-    "Africa",
-    "Latin America",
-    "Central Asia",
-    "South Asia",
-    "Middle East",
-    "Greatest Need",
-    "New Regions",
-]
-
-ROW_LABELS = [
-    "Addition Scholars (2025)",
-    "Addition Global (2025)",
-    "Pledged but not received",
-    "Addition Unrestricted (2025)",
-]
-
-
-def _safe_num(x):
-    try:
-        return float(x)
-    except Exception:
-        return 0.0
-
-
-@st.cache_data(show_spinner=False)
-def build_table(region_rev_breakdown: pd.DataFrame, region_balances: pd.DataFrame) -> pd.DataFrame:
-    # Normalize expected columns
-    rr = region_rev_breakdown.copy()
-    rb = region_balances.copy()
-
-    # Ensure required columns exist
-    for col in ["region", "mapped_class", "additions_2025"]:
-        if col not in rr.columns:
-            rr[col] = None
-    for col in ["region", "balance_total"]:
-        if col not in rb.columns:
-            rb[col] = 0.0
-
-    rr["region"] = rr["region"].astype(str)
-    rr["mapped_class"] = rr["mapped_class"].astype(str)
-
-    # Aggregate just in case there are multiple rows per region/class
-    agg_rr = (
-        rr.groupby(["region", "mapped_class"], dropna=False, as_index=False)["additions_2025"]
-        .sum()
-    )
-
-    # Helper to get a series (indexed by region) for a given class -> additions_2025
-    def values_for_class(class_name: str) -> pd.Series:
-        sub = agg_rr[agg_rr["mapped_class"] == class_name]
-        s = sub.set_index("region")["additions_2025"].map(_safe_num)
-        return s
+refresher = background_refresher()
 
-    # Row 1: Restricted - MD Scholars (2025)
-    r1 = values_for_class("Restricted - MD Scholars")
 
-    # Row 2: Restricted - Global Work (2025)
-    r2 = values_for_class("Restricted - Global Work")
+@st.cache_resource(show_spinner=False)
+def metrics_endpoint():
+    # Prometheus scrape target at :REGION_REV_METRICS_PORT/metrics (off unless set)
+    port = os.getenv("REGION_REV_METRICS_PORT")
+    return metrics.serve(int(port)) if port else None
 
-    # Row 3: Pledged but not received (balance_total from region_balances)
-    r3 = rb.set_index("region")["balance_total"].map(_safe_num)
 
-    # Row 4: Unrestricted (2025)
-    r4 = values_for_class("Unrestricted")
+metrics_endpoint()
 
-    # Combine into one DataFrame with our explicit row order
-    combined = pd.DataFrame({
-        "Addition Scholars (2025)": r1,
-        "Addition Global (2025)": r2,
-        "Pledged but not received": r3,
-        "Addition Unrestricted (2025)": r4,
-    }).fillna(0.0)
 
-    # Reindex columns for region order (axis=1), and index (rows) for row labels
-    combined = combined.T  # rows -> labels, columns -> regions
-    combined = combined.reindex(REGION_ORDER, axis=1)  # enforce region order
-    combined = combined.reindex(ROW_LABELS, axis=0)    # enforce row order
+@st.cache_resource(show_spinner=False)
+def webhook_receiver():
+    # monday board webhooks at :REGION_REV_WEBHOOK_PORT/monday/webhook, applied in batches (off unless set)
+    port = os.getenv("REGION_REV_WEBHOOK_PORT")
+    return monday_to_df.start_webhook_receiver(int(port)) if port else None
 
-    # Ensure numeric
-    for col in combined.columns:
-        combined[col] = combined[col].apply(_safe_num)
 
-    return combined
+webhooks = webhook_receiver()
 
+# Add a Run / Refresh button
+col1, col2 = st.columns([1, 8])
+with col1:
+    if st.button("🔄 Refresh Data"):
+        refresher.trigger()  # runs off the request path; the table swaps when it's ready
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def regional_views(version: str) -> dict:
+    """
+    Everything the page renders, computed once per snapshot version and shared
+    by all sessions. The key is the version string, so a rerun never hashes or
+    copies the report frames; a new snapshot simply gets a new entry.
+    """
+    reports = monday_to_df.reports_for_version(version)
+    region_rev_breakdown = reports["region_rev_breakdown"]
+    region_balances = reports["region_balances"]
+    return {
+        "table": build_table(region_rev_breakdown, region_balances),
+        "rev_head": region_rev_breakdown.head(50),
+        "balances_head": region_balances.head(50),
+        "manifest": monday_to_df.snapshot_store.read_manifest(version),
+    }
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def history_log(version: str) -> list:
+    # Keyed by the served version: the history only grows when a new snapshot is written
+    return monday_to_df.history_versions()
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def past_table(version: str) -> pd.DataFrame:
+    """The regional table of a past version, rebuilt from the local history by today's report logic."""
+    reports = monday_to_df.reports_as_of(version)
+    return build_table(reports["region_rev_breakdown"], reports["region_balances"])
+
+
+def period_comparison(version: str, table_df: pd.DataFrame, col_config: dict):
+    log = history_log(version)
+    if len(log) < 2:
+        return
+    with st.expander("Compare with an earlier snapshot"):
+        options = [e["version"] for e in reversed(log)]  # newest first
+        labels = {e["version"]: e["created_at"][:19].replace("T", " ") + " UTC" for e in log}
+        week_ago = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+        default = next((e["version"] for e in reversed(log) if e["created_at"] <= week_ago), options[-1])
+        chosen = st.selectbox("As of", options, index=options.index(default), format_func=labels.get)
+        past = past_table(chosen)
+        st.write(f"**As of {labels[chosen]}**")
+        st.dataframe(past, use_container_width=True, column_config=col_config)
+        st.write("**Change since then**")
+        st.dataframe(table_df.fillna(0) - past.fillna(0), use_container_width=True, column_config=col_config)
+
+
+def stage_table(run: dict) -> pd.DataFrame:
+    """One row per pipeline stage (plus the run total) for the debug expander."""
+    rows = []
+    # The copy stored in a manifest was taken mid-run, before the total was final
+    total = [run["total"]] if run["total"]["wall_s"] is not None else []
+    for r in run["stages"] + total:
+        labels = " ".join(f"{k}={v}" for k, v in r["labels"].items())
+        rows.append({"stage": r["stage"], "labels": labels,
+                     **{k: v for k, v in r.items() if k not in ("stage", "labels")}})
+    return pd.DataFrame(rows)
+
+
+def _age(created_at: str) -> str:
+    minutes = int((datetime.now(timezone.utc) - datetime.fromisoformat(created_at)).total_seconds() // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 120:
+        return f"{minutes} min ago"
+    return f"{minutes // 60} h ago"
+
+
+@st.fragment(run_every=VERSION_POLL_SECONDS)
+def regional_table_view():
+    # Served from the latest on-disk snapshot; monday is only contacted on refresh.
+    # Re-runs on a timer, so a snapshot swapped in by the refresher shows up by itself.
+    version = monday_to_df.current_version()
+    views = regional_views(version)
+    table_df = views["table"]
+
+    status = refresher.status()
+    if status["running"]:
+        st.caption("Refreshing from monday in the background…")
+    elif status["last_error"]:
+        st.caption(f"⚠️ Last refresh failed; showing the last good snapshot. ({status['last_error']})")
+
+    manifest = views["manifest"]
+    if manifest:
+        st.caption(
+            f"Data as of {manifest['created_at'][:19].replace('T', ' ')} UTC "
+            f"({_age(manifest['created_at'])}, snapshot {manifest['version']})."
+        )
+    if webhooks is not None:
+        hooks = webhooks.status()
+        st.caption(f"Live updates: {hooks['applied']} changes applied from monday webhooks"
+                   + (f", {hooks['queued']} queued" if hooks["queued"] else "")
+                   + (f" (last batch failed: {hooks['last_error']})" if hooks["last_error"] else "") + ".")
+
+    st.caption("Copy-paste into https://docs.google.com/spreadsheets/d/1eDJm3Vcy191uTfafAcWBXNmyGNzgCsLT/edit?usp=sharing&ouid=105572649957203637297&rtpof=true&sd=true.")
+
+    # Display with nice currency formatting
+    col_config = {region: st.column_config.NumberColumn(format="dollar") for region in table_df.columns}
+
+    st.dataframe(
+        table_df,
+        use_container_width=True,
+        column_config=col_config,
+    )
 
-table_df = build_table(region_rev_breakdown, region_balances)
+    period_comparison(version, table_df, col_config)
 
-st.caption("Copy-paste into https://docs.google.com/spreadsheets/d/1eDJm3Vcy191uTfafAcWBXNmyGNzgCsLT/edit?usp=sharing&ouid=105572649957203637297&rtpof=true&sd=true.")
+    with st.expander("Debug: preview source DataFrames"):
+        st.write("**region_rev_breakdown (head)**")
+        st.dataframe(views["rev_head"], use_container_width=True)
+        st.write("**region_balances (head)**")
+        st.dataframe(views["balances_head"], use_container_width=True)
 
-# Display with nice currency formatting
-col_config = {region: st.column_config.NumberColumn(format="dollar") for region in table_df.columns}
+        # Last refresh in this process, else the numbers stored with the snapshot
+        run = metrics.last_run() or (manifest or {}).get("metrics")
+        if run:
+            st.write(f"**Pipeline stages** (run started {run['started_at'][:19].replace('T', ' ')} UTC)")
+            st.dataframe(stage_table(run), use_container_width=True, hide_index=True)
 
-st.dataframe(
-    table_df,
-    use_container_width=True,
-    column_config=col_config,
-)
 
-with st.expander("Debug: preview source DataFrames"):
-    st.write("**region_rev_breakdown (head)**")
-    st.dataframe(region_rev_breakdown.head(50), use_container_width=True)
-    st.write("**region_balances (head)**")
-    st.dataframe(region_balances.head(50), use_container_width=True)
+regional_table_view()
 
 st.markdown("---")
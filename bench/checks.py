@@ -0,0 +1,58 @@
+"""
+Quick behaviour checks that need neither a token nor the mock API.
+
+    python bench/checks.py
+
+Each check asserts and prints one line; the first failure stops the script.
+"""
+
+import os, sys, time, threading
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import filters  # noqa: E402
+from refresher import BackgroundRefresher  # noqa: E402
+
+
+def check_trigger_during_run():
+    """Refresh clicks while a refresh runs are covered by it, not queued as a second one."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_refresh():
+        started.set()
+        release.wait(5)
+
+    refresher = BackgroundRefresher(slow_refresh, interval=0).start()
+    try:
+        refresher.trigger()
+        assert started.wait(5), "the first trigger didn't start a refresh"
+        for _ in range(3):
+            refresher.trigger()
+        release.set()
+        time.sleep(0.3)
+        assert refresher.status()["runs"] == 1, f"{refresher.status()['runs']} runs, expected 1"
+        refresher.trigger()  # once idle, a trigger runs again
+        time.sleep(0.3)
+        assert refresher.status()["runs"] == 2, f"{refresher.status()['runs']} runs, expected 2"
+    finally:
+        release.set()
+        refresher.stop(5)
+    print("refresher: triggers during a run add no extra run")
+
+
+def check_exclusive_date_range():
+    """A date range exclusive on both ends runs on monday as two AND-ed rules."""
+    flt = filters.from_spec({"field": "date", "after": "2024-01-01", "before": "2025-01-01"})
+    query_params, keep, local_fields = filters.compile_filters([flt], [], lambda field: None,
+                                                               {"rules": [{"column_id": "x"}]})
+    ops = [(r["operator"], r["compare_value"][-1]) for r in query_params["rules"][1:]]
+    assert ops == [("greater_than", "2024-01-01"), ("lower_than", "2025-01-01")], ops
+    assert query_params["operator"] == "and" and keep is None and local_fields == []
+    assert [flt.test(d) for d in ("2024-01-01", "2024-06-30", "2025-01-01")] == [False, True, False]
+    print("filters: exclusive date range pushed down as two rules")
+
+
+if __name__ == "__main__":
+    check_trigger_during_run()
+    check_exclusive_date_range()
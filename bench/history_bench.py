@@ -0,0 +1,113 @@
+"""
+Snapshot history: storage per refresh and time to rebuild a past version.
+
+The parsed frames are pulled once from the mock monday API, then --versions
+refreshes are simulated by editing --edit-share of the rows each time (gift amounts
+and classes, pledge commitments), adding a few gifts and deleting a few. Every
+version is appended to a HistoryStore; afterwards the oldest, a middle and the
+newest version are rebuilt, run through the report logic and build_table, and
+checked against the reports computed when the version was written.
+
+    python bench/history_bench.py --versions 60 --edit-share 0.01
+"""
+
+import os, sys, time, shutil, tempfile, argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Must be set before monday_to_df is imported (it reads them at import time)
+_tmp = tempfile.mkdtemp(prefix="region-rev-history-")
+os.environ.setdefault("MONDAY_API_TOKEN", "bench")
+os.environ["MONDAY_CACHE_DIR"] = os.path.join(_tmp, "cache")
+os.environ["REGION_REV_SNAPSHOT_DIR"] = os.path.join(_tmp, "snapshots")
+os.environ["REGION_REV_HISTORY_DIR"] = ""  # the bench writes its own history below
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import monday_to_df as m  # noqa: E402
+import report  # noqa: E402
+from history import HistoryStore  # noqa: E402
+from mock_monday import serve, add_board_args, mock_from_args, CLASSES  # noqa: E402
+
+
+def edit(frames, rng, churn, next_id):
+    """One refresh worth of board edits, on copies of the frames."""
+    out = {name: df.copy() for name, df in frames.items()}
+    for name in ("gifts25_df", "gifts_old_df"):
+        df = out[name]
+        rows = rng.random(len(df)) < churn
+        df.loc[rows, "amount"] = np.round(rng.random(rows.sum()) * 2000, 2)
+        flip = rows & (rng.random(len(df)) < 0.3)
+        df["mapped_class"] = df["mapped_class"].cat.add_categories(
+            [c for c in CLASSES[:3] if c not in df["mapped_class"].cat.categories])
+        df.loc[flip, "mapped_class"] = rng.choice(CLASSES[:3], flip.sum())
+        added = df.sample(max(1, int(len(df) * churn / 5)), random_state=int(rng.integers(1 << 31)))
+        added = added.assign(gift_id=pd.array(np.arange(next_id, next_id + len(added)), dtype="Int64"))
+        next_id += len(added)
+        kept = df[rng.random(len(df)) >= churn / 5]
+        out[name] = m.concat_frames([kept, added])
+    pledges = out["pledges_df"]
+    rows = rng.random(len(pledges)) < churn
+    pledges.loc[rows, "total_commitment"] = rng.choice([500.0, 1000.0, 5000.0, 20000.0], rows.sum())
+    return out, next_id
+
+
+def reports_of(frames):
+    gifts = m.concat_frames([frames["gifts25_df"], frames["gifts_old_df"]])
+    return {"region_rev_breakdown": m.summarize_region_gifts(frames["pledges_df"], gifts),
+            "region_balances": m.balances_by_region(frames["pledges_df"], gifts)}
+
+
+def run(args):
+    mock = mock_from_args(args)
+    server, api_url = serve(mock)
+    m.client.api_url = api_url
+    try:
+        snapshot, _ = m.run_pipeline()
+    finally:
+        server.shutdown()
+    frames = {name: snapshot[name] for name in m.HISTORY_TABLES}
+    full_bytes = sum(os.path.getsize(os.path.join(m.snapshot_store._dir(snapshot["version"]), f"{name}.arrow"))
+                     for name in m.HISTORY_TABLES)
+
+    store = HistoryStore(os.path.join(_tmp, "history"))
+    rng = np.random.default_rng(args.seed)
+    next_id = 9_000_000_000
+    expected, append_s = {}, []
+    for i in range(args.versions):
+        if i:
+            frames, next_id = edit(frames, rng, args.edit_share, next_id)
+        version = f"v{i:04d}"
+        t0 = time.perf_counter()
+        store.append(version, frames, m.HISTORY_TABLES)
+        append_s.append(time.perf_counter() - t0)
+        if i in (0, args.versions // 2, args.versions - 1):
+            expected[version] = reports_of(frames)
+
+    print(f"{args.versions} versions of {sum(len(df) for df in frames.values()):,} rows, {args.edit_share:.1%} churn each")
+    print(f"history: {store.storage_bytes() / 1e6:.2f} MB; {args.versions} full snapshots of these tables: "
+          f"{args.versions * full_bytes / 1e6:.2f} MB")
+    print(f"append: median {np.median(append_s) * 1000:.0f} ms per version")
+    for version, want in expected.items():
+        t0 = time.perf_counter()
+        past = store.read(version)
+        got = reports_of(past)
+        table = report.build_table(got["region_rev_breakdown"], got["region_balances"])
+        took = time.perf_counter() - t0
+        for name in want:
+            pd.testing.assert_frame_equal(want[name].reset_index(drop=True), got[name].reset_index(drop=True),
+                                          check_exact=False, rtol=1e-9)
+        print(f"{version}: rebuilt, reports and table in {took * 1000:.0f} ms (table {table.shape}); reports match")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=60)
+    parser.add_argument("--edit-share", type=float, default=0.01, help="share of rows edited per refresh")
+    add_board_args(parser)
+    args = parser.parse_args()
+    try:
+        run(args)
+    finally:
+        shutil.rmtree(_tmp, ignore_errors=True)
@@ -0,0 +1,399 @@
+"""
+Local stand-in for https://api.monday.com/v2, for offline benchmarks.
+
+Serves synthetic Pledges / 2025 Gifts / 2012-24 Gifts / Donors boards of any
+size through the same GraphQL shapes monday_to_df uses: items_page and
+next_items_page cursor pagination, items(ids: [...]) and query_params ids,
+board columns and items_count,
+column_values(ids: ...) projection, the `__last_updated__` rule, and the
+`complexity` block. Column values carry only the fields the query's Cols
+fragment selects for their type, and responses are gzipped when the client
+accepts it, so payload sizes track what monday would send. Items are generated
+deterministically from (board, index) on demand, so a 1M-item board costs no
+memory up front. Latency, 429s, an outage after N requests and cursor expiry
+can be injected.
+
+    python bench/mock_monday.py --port 8765 --pledges 100000 --fanout 4
+    MONDAY_API_URL=http://127.0.0.1:8765/v2 MONDAY_API_TOKEN=x streamlit run app.py
+"""
+
+import os, re, sys, gzip, json, time, random, base64, argparse, threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from monday_to_df import (  # noqa: E402  (column ids must match the real boards)
+    BOARD_PLEDGES, BOARD_GIFTS_2025, BOARD_GIFTS_2012_24, BOARD_DONORS,
+    P_COMMITMENT_TYPE, P_TOTAL_COMMITMENT, P_REGION, P_LINKED_GIFTS, P_EMAIL, P_PHONE,
+    P_SECOND_PHONE, P_ADDR, P_CITY, P_STATE, P_ZIP,
+    G25_LINKED_DONOR, G25_LINKED_SOFT_CREDIT, G25_AMOUNT, G25_GL, G25_CLASS, G25_PREF,
+    G25_SOLIC, G25_CHECK, G25_MAPPED_CLASS,
+    GOLD_GL, GOLD_CHECK, GOLD_MAPPED_CLASS,
+    D_EMAIL, D_PHONE, D_ADDR,
+)
+
+REGIONS = ["Africa", "Latin America", "Central Asia", "South Asia", "Middle East", "Greatest Need", "New Regions"]
+CLASSES = ["Restricted - MD Scholars", "Restricted - Global Work", "Unrestricted", ""]
+COMMITMENTS = ["3-Year Pledge", "One-Time", "Annual"]
+OLD_DATE = "2025-01-01T00:00:00Z"
+
+# Ids are board base + index, so an id alone tells us which board and which item
+ID_BASE = {BOARD_PLEDGES: 10_000_000_000, BOARD_GIFTS_2025: 20_000_000_000,
+           BOARD_GIFTS_2012_24: 30_000_000_000, BOARD_DONORS: 40_000_000_000}
+
+
+class SyntheticBoards:
+    def __init__(self, pledges=10_000, gifts_2025=20_000, gifts_old=40_000, donors=20_000,
+                 fanout=4.0, churn=0.0, seed=7):
+        self.sizes = {BOARD_PLEDGES: pledges, BOARD_GIFTS_2025: gifts_2025,
+                      BOARD_GIFTS_2012_24: gifts_old, BOARD_DONORS: donors}
+        self.fanout = fanout
+        self.churn = churn
+        self.seed = seed
+        self.today = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    def _rng(self, board_id, idx):
+        return random.Random((self.seed * 1_000_003 + board_id) * 10_000_019 + idx)
+
+    def _updated_at(self, rng):
+        return self.today if rng.random() < self.churn else OLD_DATE
+
+    def locate(self, item_id):
+        item_id = int(item_id)
+        for board_id, base in ID_BASE.items():
+            idx = item_id - base
+            if 0 <= idx < self.sizes[board_id]:
+                return board_id, idx
+        return None
+
+    def item(self, board_id, idx):
+        rng = self._rng(board_id, idx)
+        item_id = str(ID_BASE[board_id] + idx)
+        if board_id == BOARD_PLEDGES:
+            return self._pledge(rng, item_id, idx)
+        if board_id == BOARD_DONORS:
+            return self._donor(rng, item_id, idx)
+        return self._gift(rng, item_id, idx, board_id == BOARD_GIFTS_2025)
+
+    @staticmethod
+    def _cv(col_id, col_type, text, **typed):
+        return {"id": col_id, "type": col_type, "text": text, **typed}
+
+    def _relation(self, col_id, ids):
+        ids = [str(i) for i in ids]
+        return self._cv(col_id, "board_relation", ", ".join(ids),
+                        linked_item_ids=ids, linked_items=[{"id": i} for i in ids])
+
+    def _pledge(self, rng, item_id, idx):
+        n_links = min(int(rng.expovariate(1.0 / self.fanout)) if self.fanout else 0, 50)
+        links = []
+        for _ in range(n_links):
+            board = BOARD_GIFTS_2025 if rng.random() < 0.4 else BOARD_GIFTS_2012_24
+            if self.sizes[board]:
+                links.append(ID_BASE[board] + rng.randrange(self.sizes[board]))
+        total = float(rng.choice([500, 1000, 2500, 3000, 10000, 25000]))
+        return {
+            "id": item_id,
+            "name": f"Pledge {idx}",
+            "updated_at": self._updated_at(rng),
+            "group": {"id": "g", "title": rng.choice(["2024", "2025"])},
+            "column_values": [
+                self._cv(P_COMMITMENT_TYPE, "status", rng.choice(COMMITMENTS), index=0),
+                self._cv(P_TOTAL_COMMITMENT, "numbers", str(total), number=total),
+                self._cv(P_REGION, "dropdown", rng.choice(REGIONS)),
+                self._relation(P_LINKED_GIFTS, links),
+                self._cv(P_EMAIL, "email", f"pledger{idx}@example.org", email=f"pledger{idx}@example.org"),
+                self._cv(P_PHONE, "phone", f"+1555{idx:07d}", phone=f"+1555{idx:07d}", country_short_name="US"),
+                self._cv(P_SECOND_PHONE, "phone", "", phone=None, country_short_name=None),
+                self._cv(P_ADDR, "text", f"{idx} Main St"),
+                self._cv(P_CITY, "text", "Springfield"),
+                self._cv(P_STATE, "dropdown", rng.choice(["CA", "NY", "TX", "IL"])),
+                self._cv(P_ZIP, "text", f"{rng.randrange(10000, 99999)}"),
+            ],
+        }
+
+    def _gift(self, rng, item_id, idx, is_2025):
+        amount = round(rng.choice([25, 50, 100, 250, 1000, 5000]) * rng.random() * 2, 2)
+        donor = ID_BASE[BOARD_DONORS] + rng.randrange(max(self.sizes[BOARD_DONORS], 1))
+        soft = [ID_BASE[BOARD_DONORS] + rng.randrange(max(self.sizes[BOARD_DONORS], 1))] if rng.random() < 0.2 else []
+        group = "2025 Gifts" if is_2025 else rng.choice(["2024 Gifts", "2023 Gifts", "2022 Gifts"])
+        gl, check, mapped = (G25_GL, G25_CHECK, G25_MAPPED_CLASS) if is_2025 else (GOLD_GL, GOLD_CHECK, GOLD_MAPPED_CLASS)
+        return {
+            "id": item_id,
+            "name": f"Gift {idx}",
+            "updated_at": self._updated_at(rng),
+            "group": {"id": "g", "title": group},
+            "column_values": [
+                self._relation(G25_LINKED_DONOR, [donor]),
+                self._relation(G25_LINKED_SOFT_CREDIT, soft),
+                self._cv(G25_AMOUNT, "numbers", str(amount), number=amount),
+                self._cv(gl, "dropdown", rng.choice(["4000", "4100", "4200"])),
+                self._cv(G25_CLASS, "dropdown", rng.choice(["Scholars", "Global", "General"])),
+                self._cv(G25_PREF, "dropdown", rng.choice(["Online", "Check", "Wire"])),
+                self._cv(G25_SOLIC, "dropdown", rng.choice(["Gala", "Mailer", "Email"])),
+                self._cv(check, "checkbox", rng.choice(["v", ""])),
+                self._cv(mapped, "dropdown", rng.choice(CLASSES)),
+            ],
+        }
+
+    def _donor(self, rng, item_id, idx):
+        return {
+            "id": item_id,
+            "name": f"Donor {idx}",
+            "updated_at": self._updated_at(rng),
+            "group": {"id": "g", "title": "Donors"},
+            "column_values": [
+                self._cv(D_EMAIL, "email", f"donor{idx}@example.org", email=f"donor{idx}@example.org"),
+                self._cv(D_PHONE, "phone", f"+1444{idx:07d}", phone=f"+1444{idx:07d}", country_short_name="US"),
+                self._cv(D_ADDR, "text", f"{idx} Oak Ave"),
+            ],
+        }
+
+
+# Column value type → GraphQL type the Cols fragment's `... on X` blocks name
+GQL_TYPES = {"numbers": "NumbersValue", "status": "StatusValue", "dropdown": "DropdownValue",
+             "email": "EmailValue", "phone": "PhoneValue", "text": "TextValue",
+             "checkbox": "CheckboxValue", "board_relation": "BoardRelationValue"}
+
+
+@lru_cache(maxsize=64)
+def fragment_fields(query):
+    """{GraphQL type: fields} selected by the query's Cols fragment ("" = fields on every column value)."""
+    start = query.find("fragment Cols on ColumnValue")
+    if start < 0:
+        return {"": ("id", "text", "type")}
+    body, depth = [], 0
+    for ch in query[query.index("{", start):]:
+        depth += (ch == "{") - (ch == "}")
+        body.append(ch)
+        if depth == 0:
+            break
+    body = re.sub(r"#[^\n]*", "", "".join(body)[1:-1])
+    typed = {}
+    for name, fields in re.findall(r"\.\.\.\s*on\s+(\w+)\s*\{((?:[^{}]|\{[^{}]*\})*)\}", body):
+        typed[name] = tuple(re.sub(r"\{[^{}]*\}", " ", fields).split())
+    common = re.sub(r"\.\.\.\s*on\s+\w+\s*\{(?:[^{}]|\{[^{}]*\})*\}", " ", body)
+    return {"": tuple(re.sub(r"\{[^{}]*\}", " ", common).split()), **typed}
+
+
+class MockMonday:
+    """GraphQL request handling (just the query shapes the pipeline sends)."""
+
+    def __init__(self, boards: SyntheticBoards, latency_ms=0.0, rate_429=0.0,
+                 complexity_per_minute=5_000_000, gzip=True, fail_after=None, cursor_ttl=None):
+        self.boards = boards
+        self.gzip = gzip
+        self.latency = latency_ms / 1000.0
+        self.rate_429 = rate_429
+        self.fail_after = fail_after  # requests served before every later one gets a 503 (None = never)
+        self.cursor_ttl = cursor_ttl  # seconds a cursor stays valid (monday: 3600; None = forever)
+        self._cursors_from = 0.0      # cursors issued before this time have expired (see expire_cursors)
+        self.budget = complexity_per_minute
+        self._window = (time.monotonic(), 0)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "items_served": 0, "bytes_sent": 0, "bytes_json": 0}
+
+    def expire_cursors(self):
+        """Invalidate every cursor handed out so far, as if they had all outlived their TTL."""
+        self._cursors_from = time.time()
+
+    @staticmethod
+    def _cursor(board_id, offset, query_params):
+        raw = json.dumps([board_id, offset, query_params, time.time()]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _uncursor(cursor):
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+    def _matches(self, item, query_params):
+        # __last_updated__ and is_(not_)empty are evaluated; other rules (e.g. the
+        # date rule, which refers to a column the synthetic boards don't have) pass
+        for rule in (query_params or {}).get("rules") or []:
+            if rule.get("column_id") == "__last_updated__":
+                if item["updated_at"][:10] < rule["compare_value"][-1][:10]:
+                    return False
+            elif rule.get("operator") in ("is_empty", "is_not_empty"):
+                cv = next((c for c in item["column_values"] if c["id"] == rule["column_id"]), None)
+                if bool(cv and cv.get("text")) != (rule["operator"] == "is_not_empty"):
+                    return False
+        return True
+
+    @staticmethod
+    def _shape(item, query):
+        """Keep only the fields the query asked for (column projection, id-only pages)."""
+        if "column_values" not in query:
+            return {"id": item["id"]}
+        m = re.search(r"column_values\(ids:\s*(\[[^\]]*\])", query)
+        if m:
+            wanted = set(json.loads(m.group(1)))
+            item = dict(item, column_values=[cv for cv in item["column_values"] if cv["id"] in wanted])
+        if "group {" not in query:
+            item = {k: v for k, v in item.items() if k != "group"}
+        fields = fragment_fields(query)
+        item["column_values"] = [
+            {k: cv[k] for k in fields[""] + fields.get(GQL_TYPES.get(cv["type"]), ()) if k in cv}
+            for cv in item["column_values"]
+        ]
+        return item
+
+    def _page(self, board_id, offset, limit, query_params, query):
+        if (query_params or {}).get("ids"):
+            # items_page(query_params: {ids: [...]}): just those items, one page
+            locs = [self.boards.locate(i) for i in query_params["ids"]]
+            items = [self.boards.item(*loc) for loc in locs if loc and loc[0] == board_id]
+            items = [self._shape(it, query) for it in items if self._matches(it, query_params)]
+            return {"cursor": None, "items": items}
+        size = self.boards.sizes.get(board_id, 0)
+        items = []
+        idx = offset
+        while idx < size and len(items) < limit:
+            it = self.boards.item(board_id, idx)
+            idx += 1
+            if self._matches(it, query_params):
+                items.append(self._shape(it, query))
+        cursor = self._cursor(board_id, idx, query_params) if idx < size else None
+        return {"cursor": cursor, "items": items}
+
+    def _charge(self, cost):
+        with self._lock:
+            start, used = self._window
+            now = time.monotonic()
+            if now - start >= 60:
+                start, used = now, 0
+            used += cost
+            self._window = (start, used)
+            return max(self.budget - used, 0), int(60 - (now - start))
+
+    def handle(self, payload):
+        """Returns (status, response dict)."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.stats["requests"] += 1
+            down = self.fail_after is not None and self.stats["requests"] > self.fail_after
+        if down:
+            return 503, {"error_message": "mock: outage"}
+        if self.rate_429 and random.random() < self.rate_429:
+            with self._lock:
+                self.stats["throttled"] += 1
+            return 429, {"error_message": "Rate limit exceeded"}
+
+        query = payload.get("query") or ""
+        v = payload.get("variables") or {}
+        limit = int(v.get("limit") or 25)
+        if "next_items_page" in query:
+            board_id, offset, qp, issued = self._uncursor(v["cursor"])
+            if issued < self._cursors_from or (self.cursor_ttl is not None and time.time() - issued > self.cursor_ttl):
+                return 200, {"errors": [{"message": "CursorExpiredError: The cursor provided for pagination has expired",
+                                         "extensions": {"code": "CursorExpiredError"}}]}
+            data = {"next_items_page": self._page(board_id, offset, limit, qp, query)}
+            n = len(data["next_items_page"]["items"])
+        elif re.search(r"\bitems\s*\(\s*ids", query):
+            out = []
+            for item_id in v.get("ids") or []:
+                loc = self.boards.locate(item_id)
+                if loc:
+                    out.append(self._shape(self.boards.item(*loc), query))
+            data = {"items": out}
+            n = len(out)
+        elif "items_page" in query:
+            board_id = int((v.get("board_id") or [0])[0])
+            offset = self._uncursor(v["cursor"])[1] if v.get("cursor") else 0
+            qp = v.get("query_params")
+            data = {"boards": [{"items_page": self._page(board_id, offset, limit, qp, query)}]}
+            n = len(data["boards"][0]["items_page"]["items"])
+        elif "items_count" in query:
+            board_id = int((v.get("board_id") or [0])[0])
+            data = {"boards": [{"items_count": self.boards.sizes.get(board_id, 0)}]}
+            n = 0
+        elif "columns" in query:
+            board_id = int((v.get("board_id") or [0])[0])
+            sample = self.boards.item(board_id, 0)["column_values"] if self.boards.sizes.get(board_id) else []
+            data = {"boards": [{"columns": [{"id": cv["id"], "title": cv["id"], "type": cv["type"]} for cv in sample]}]}
+            n = 0
+        else:
+            return 200, {"errors": [{"message": "mock: unsupported query"}]}
+
+        cost = 1000 + 10 * n * (1 if "column_values" not in query else 10)
+        remaining, reset = self._charge(cost)
+        if "complexity" in query:
+            data["complexity"] = {"query": cost, "after": remaining, "reset_in_x_seconds": reset}
+        with self._lock:
+            self.stats["items_served"] += n
+        return 200, {"data": data}
+
+
+def make_handler(mock: MockMonday):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            status, out = mock.handle(json.loads(body or b"{}"))
+            raw = json.dumps(out, separators=(",", ":")).encode()
+            gzipped = mock.gzip and "gzip" in (self.headers.get("Accept-Encoding") or "")
+            sent = gzip.compress(raw, compresslevel=6) if gzipped else raw
+            with mock._lock:
+                mock.stats["bytes_sent"] += len(sent)
+                mock.stats["bytes_json"] += len(raw)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(sent)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(sent)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(mock: MockMonday, host="127.0.0.1", port=0):
+    """Start the mock on a background thread; returns (server, url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-monday", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v2"
+
+
+def add_board_args(parser):
+    parser.add_argument("--pledges", type=int, default=10_000)
+    parser.add_argument("--gifts-2025", type=int, default=20_000)
+    parser.add_argument("--gifts-old", type=int, default=40_000)
+    parser.add_argument("--donors", type=int, default=20_000)
+    parser.add_argument("--fanout", type=float, default=4.0, help="mean gifts linked per pledge")
+    parser.add_argument("--churn", type=float, default=0.0, help="share of items updated 'today'")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every response")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability a request gets a 429")
+    parser.add_argument("--no-gzip", action="store_true", help="never compress responses")
+    parser.add_argument("--fail-after", type=int, help="answer 503 to every request after this many")
+    parser.add_argument("--cursor-ttl", type=float, help="seconds a cursor stays valid (default: forever)")
+    parser.add_argument("--seed", type=int, default=7)
+
+
+def mock_from_args(args) -> MockMonday:
+    boards = SyntheticBoards(args.pledges, args.gifts_2025, args.gifts_old, args.donors,
+                             fanout=args.fanout, churn=args.churn, seed=args.seed)
+    return MockMonday(boards, latency_ms=args.latency_ms, rate_429=args.rate_429, gzip=not args.no_gzip,
+                      fail_after=args.fail_after, cursor_ttl=args.cursor_ttl)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_board_args(parser)
+    args = parser.parse_args()
+    server, url = serve(mock_from_args(args), args.host, args.port)
+    print(f"mock monday API listening on {url}  (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
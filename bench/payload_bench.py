@@ -0,0 +1,105 @@
+"""
+Wire and decode cost of one items_page per board, before and after the lean
+Cols fragment: bytes per item (JSON as sent, and gzipped) and the time to
+decode a page with json and with orjson. "before" is the fragment as it used
+to be (BASELINE_FRAGMENT), "after" is monday_to_df.COLUMN_FRAGMENT; both are
+measured for the columns a table refresh selects and for every column.
+
+    python bench/payload_bench.py
+    python bench/payload_bench.py --page 500 --json
+"""
+
+import os, sys, gzip, json, time, argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MONDAY_API_TOKEN", "bench")
+
+import monday_to_df as m  # noqa: E402
+from mock_monday import SyntheticBoards, MockMonday  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BASELINE_FRAGMENT = """
+fragment Cols on ColumnValue {
+  id
+  text
+  type
+  ... on NumbersValue { number }
+  ... on StatusValue { index text }
+  ... on DropdownValue { text }
+  ... on EmailValue { email text }
+  ... on PhoneValue { phone country_short_name text }
+  ... on TextValue { text }
+  ... on BoardRelationValue { linked_item_ids linked_items { id } }
+}
+"""
+
+
+def page_query(board_id, fragment, column_ids, item_fields, limit):
+    _, selection = m._item_selection(column_ids, item_fields)
+    return f"""
+    {fragment}
+    query {{ boards(ids: [{board_id}]) {{ items_page(limit: {limit}) {{ cursor items {{ {selection} }} }} }} }}
+    """
+
+
+def decode_ms(loads, raw, repeat):
+    """Best of `repeat` decodes, like timeit: the run least disturbed by GC and other load."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        loads(raw)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def run(args):
+    mock = MockMonday(SyntheticBoards(pledges=args.page, gifts_2025=args.page, gifts_old=args.page,
+                                      donors=args.page, fanout=args.fanout))
+    plans = {name: m.fetch_plan(name, m.TABLE_REPORTS) for name in m.BOARDS}
+    boards = {name: (plan["board_id"], plan["column_ids"]) for name, plan in plans.items()}
+    boards["donors"] = (m.BOARD_DONORS, m.DONOR_COLS)
+
+    rows = []
+    for name, (board_id, table_cols) in boards.items():
+        for selection, column_ids in (("table", table_cols), ("all", None)):
+            for label, fragment in (("before", BASELINE_FRAGMENT), ("after", m.COLUMN_FRAGMENT)):
+                query = page_query(board_id, fragment, column_ids, m.ITEM_FIELDS, args.page)
+                _, out = mock.handle({"query": query, "variables": {"board_id": [board_id], "limit": args.page}})
+                raw = json.dumps(out, separators=(",", ":")).encode()
+                n = len(out["data"]["boards"][0]["items_page"]["items"])
+                rows.append({
+                    "board": name, "columns": selection, "fragment": label,
+                    "bytes_per_item": round(len(raw) / n),
+                    "gzip_bytes_per_item": round(len(gzip.compress(raw, compresslevel=6)) / n),
+                    "json_ms": round(decode_ms(json.loads, raw, args.repeat), 2),
+                    "orjson_ms": round(decode_ms(orjson.loads, raw, args.repeat), 2) if orjson else None,
+                })
+    return rows
+
+
+def print_table(rows):
+    print(f"{'board':<12}{'columns':<9}{'fragment':<10}{'B/item':>8}{'gzip B/item':>13}{'json ms':>10}{'orjson ms':>11}")
+    for r in rows:
+        orj = "n/a" if r["orjson_ms"] is None else f"{r['orjson_ms']:.2f}"
+        print(f"{r['board']:<12}{r['columns']:<9}{r['fragment']:<10}{r['bytes_per_item']:>8}"
+              f"{r['gzip_bytes_per_item']:>13}{r['json_ms']:>10.2f}{orj:>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", type=int, default=500, help="items per page (monday's maximum is 500)")
+    parser.add_argument("--fanout", type=float, default=4.0, help="mean gifts linked per pledge")
+    parser.add_argument("--repeat", type=int, default=20, help="decodes per timing (the best one counts)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
@@ -0,0 +1,144 @@
+"""
+Replay monday webhook payloads (one JSON body per line, as recorded with
+REGION_REV_WEBHOOK_RECORD) against a webhook receiver.
+
+    python bench/replay_webhooks.py events.jsonl --url "http://127.0.0.1:8787/monday/webhook?token=..."
+    python bench/replay_webhooks.py events.jsonl                     # in-process, against the mock boards
+    python bench/replay_webhooks.py --synthesize 200 > events.jsonl   # made-up payloads for the mock boards
+
+In-process, a baseline snapshot is built from the mock monday API first; the
+payloads are then POSTed to a local receiver and applied as one batch, and the
+cube-maintained reports are checked against a from-scratch aggregation of the
+new snapshot. Board options must match the ones the payloads were made for.
+"""
+
+import os, sys, json, time, random, tempfile, argparse, urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Must be set before monday_to_df is imported (it reads them at import time)
+_tmp = tempfile.mkdtemp(prefix="region-rev-replay-")
+os.environ.setdefault("MONDAY_API_TOKEN", "bench")
+os.environ["MONDAY_CACHE_DIR"] = os.path.join(_tmp, "cache")
+os.environ["REGION_REV_SNAPSHOT_DIR"] = os.path.join(_tmp, "snapshots")
+os.environ["REGION_REV_HISTORY_DIR"] = os.path.join(_tmp, "history")  # never the app's own history
+
+import pandas as pd  # noqa: E402
+import monday_to_df as m  # noqa: E402
+import report  # noqa: E402
+from mock_monday import ID_BASE, REGIONS, CLASSES, serve, add_board_args, mock_from_args  # noqa: E402
+
+
+def synthesize(n, args):
+    """n webhook bodies touching the mock boards: column edits, re-links, creates, renames, deletes."""
+    rng = random.Random(args.seed)
+    sizes = {m.BOARD_PLEDGES: args.pledges, m.BOARD_GIFTS_2025: args.gifts_2025, m.BOARD_GIFTS_2012_24: args.gifts_old}
+    pick = lambda board: str(ID_BASE[board] + rng.randrange(sizes[board]))
+    gift_board = lambda: rng.choice([m.BOARD_GIFTS_2025, m.BOARD_GIFTS_2012_24])
+
+    def column(board, item_id, column_id, column_type, value):
+        return {"type": "update_column_value", "boardId": board, "pulseId": item_id,
+                "columnId": column_id, "columnType": column_type, "value": value,
+                "changedAt": time.time()}
+
+    makers = [
+        lambda: column(m.BOARD_PLEDGES, pick(m.BOARD_PLEDGES), m.P_TOTAL_COMMITMENT, "numeric",
+                       {"value": str(rng.choice([500, 1000, 5000, 20000]))}),
+        lambda: column(m.BOARD_PLEDGES, pick(m.BOARD_PLEDGES), m.P_REGION, "dropdown",
+                       {"chosenValues": [{"id": 1, "name": rng.choice(REGIONS)}]}),
+        lambda: column(m.BOARD_PLEDGES, pick(m.BOARD_PLEDGES), m.P_LINKED_GIFTS, "board-relation",
+                       {"linkedPulseIds": [{"linkedPulseId": int(pick(gift_board()))} for _ in range(rng.randrange(4))]}),
+        lambda: (lambda b: column(b, pick(b), m.G25_AMOUNT, "numeric",
+                                  {"value": str(round(rng.random() * 2000, 2))}))(gift_board()),
+        lambda: (lambda b: column(b, pick(b), m.G25_MAPPED_CLASS if b == m.BOARD_GIFTS_2025 else m.GOLD_MAPPED_CLASS,
+                                  "dropdown", {"chosenValues": [{"id": 2, "name": rng.choice(CLASSES[:3])}]}))(gift_board()),
+        lambda: (lambda b: {"type": "create_pulse", "boardId": b, "pulseId": pick(b)})(gift_board()),
+        lambda: {"type": "update_name", "boardId": m.BOARD_PLEDGES, "pulseId": pick(m.BOARD_PLEDGES)},
+        lambda: (lambda b: {"type": "delete_pulse", "boardId": b, "pulseId": pick(b)})(
+            rng.choice([m.BOARD_PLEDGES, m.BOARD_GIFTS_2025, m.BOARD_GIFTS_2012_24])),
+    ]
+    weights = [4, 2, 2, 6, 3, 1, 1, 1]
+    return [{"event": rng.choices(makers, weights)[0]()} for _ in range(n)]
+
+
+def read_payloads(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return resp.status
+
+
+def replay(payloads, url):
+    t0 = time.perf_counter()
+    for payload in payloads:
+        post(url, payload)
+    return time.perf_counter() - t0
+
+
+def run_local(payloads, args):
+    mock = mock_from_args(args)
+    server, api_url = serve(mock)
+    m.client.api_url = api_url
+    receiver = None
+    try:
+        m.refresh_snapshot()
+        before = report.build_table(**m.build_reports())
+        requests_before = m.client.stats()["requests"]
+
+        # A batch window longer than the replay: everything is applied by the one flush() below
+        receiver = m.webhooks.WebhookReceiver(m.apply_webhook_events, boards=m.WEBHOOK_BOARDS,
+                                              batch_seconds=3600).start(0, "127.0.0.1")
+        post_s = replay(payloads, receiver.url)
+        t0 = time.perf_counter()
+        version = receiver.flush()
+        apply_s = time.perf_counter() - t0
+
+        snapshot, reports = m.load_snapshot(), m.build_reports()
+        scratch = m.aggregate(snapshot)
+        for name in scratch:
+            pd.testing.assert_frame_equal(scratch[name], reports[name], check_exact=False, rtol=1e-9)
+        after = report.build_table(**reports)
+        manifest = m.snapshot_manifest()
+    finally:
+        if receiver is not None:
+            receiver.stop()
+        server.shutdown()
+
+    status = receiver.status()
+    cube = manifest["cube"]
+    print(f"{len(payloads)} payloads posted in {post_s:.2f}s; {status['applied']} applied, {status['ignored']} ignored, "
+          f"{status['failures']} failed batches ({status['last_error'] or 'no error'})")
+    print(f"batch applied in {apply_s:.2f}s with {m.client.stats()['requests'] - requests_before} monday requests; "
+          f"snapshot {version}, cube {cube['mode']} ({cube['pledges_recomputed']} pledges recomputed)")
+    print("reports match a from-scratch aggregation\n")
+    print("table change (after - before):")
+    print((after - before).round(2).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payloads", nargs="?", help="JSON lines (or a JSON array) of webhook bodies")
+    parser.add_argument("--url", help="POST to a running receiver instead of replaying in-process")
+    parser.add_argument("--synthesize", type=int, metavar="N", help="print N synthetic payloads and exit")
+    add_board_args(parser)
+    args = parser.parse_args()
+
+    if args.synthesize:
+        for payload in synthesize(args.synthesize, args):
+            print(json.dumps(payload))
+    elif not args.payloads:
+        parser.error("a payload file is required (or --synthesize N)")
+    elif args.url:
+        payloads = read_payloads(args.payloads)
+        print(f"{len(payloads)} payloads posted in {replay(payloads, args.url):.2f}s")
+    else:
+        run_local(read_payloads(args.payloads), args)
@@ -0,0 +1,83 @@
+"""
+Interrupt a large board fetch part way and resume it from its page checkpoint.
+
+The mock monday API goes down after --fail-pages pages of the 2012-24 Gifts
+board; the fetch fails once the client's retries run out, leaving the pages it
+got in the checkpoint. The mock then comes back and the same fetch is run
+again, once resuming from the saved cursor and once with the cursor expired
+(so the id-only fallback runs). Both results are checked against an
+uninterrupted fetch, and the requests, bytes and complexity each needed are
+printed. The fallback sends more (but lighter) requests than the cursor: the
+id-only pass is a page per 500 ids, and missing items are read 100 per request,
+several requests at a time. With less than half the board checkpointed it
+pages through the board again instead (lower --fail-pages to see that).
+
+    python bench/resume_fetch.py --gifts-old 50000 --fail-pages 60
+"""
+
+import os, sys, shutil, tempfile, argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Must be set before monday_to_df is imported (it reads them at import time)
+_tmp = tempfile.mkdtemp(prefix="region-rev-resume-")
+os.environ.setdefault("MONDAY_API_TOKEN", "bench")
+os.environ["MONDAY_CACHE_DIR"] = os.path.join(_tmp, "cache")
+os.environ["MONDAY_CHECKPOINT_PAGES"] = "1"
+
+import monday_to_df as m  # noqa: E402
+from mock_monday import serve, add_board_args, mock_from_args  # noqa: E402
+
+
+def run(args):
+    mock = mock_from_args(args)
+    server, api_url = serve(mock)
+    m.client.api_url = api_url
+    m.client.max_retries = 2  # fail fast once the mock is down
+    plan = m.fetch_plan("gifts_old", m.TABLE_REPORTS)
+    fetch = lambda checkpoint: m.fetch_all_items(plan["board_id"], column_ids=plan["column_ids"],
+                                                 query_params=plan["query_params"], item_fields=plan["item_fields"],
+                                                 checkpoint=checkpoint)
+
+    def cost_of(fn):
+        before = m.client.stats()
+        out = fn()
+        after = m.client.stats()
+        return out, {k: after[k] - before[k] for k in ("requests", "bytes_received", "complexity_used")}
+
+    def describe(cost, clean=None):
+        share = "" if clean is None else f" ({cost['complexity_used'] / clean['complexity_used']:.0%} of a fresh fetch's complexity)"
+        return (f"{cost['requests']} requests, {cost['bytes_received'] / 1e6:.1f} MB, "
+                f"complexity {cost['complexity_used']:,}{share}")
+
+    try:
+        reference, clean = cost_of(lambda: fetch(False))
+        print(f"uninterrupted fetch: {len(reference)} items, {describe(clean)}")
+
+        for label, expire in (("cursor", False), ("id fallback", True)):
+            mock.fail_after = mock.stats["requests"] + args.fail_pages
+            try:
+                fetch(True)
+                raise SystemExit("the outage didn't interrupt the fetch; lower --fail-pages")
+            except RuntimeError as e:
+                saved = m.page_checkpoints.load(m._checkpoint_key(plan["board_id"], plan["column_ids"],
+                                                                  plan["query_params"], plan["item_fields"]))
+                print(f"\ninterrupted: {e} ({saved['pages']} pages, {len(saved['items'])} items checkpointed)")
+            mock.fail_after = None
+            if expire:
+                mock.expire_cursors()
+            items, used = cost_of(lambda: fetch(True))
+            assert items == reference, f"resumed fetch ({label}) differs from the uninterrupted one"
+            print(f"resumed via {label}: {describe(used, clean)}; items match")
+    finally:
+        server.shutdown()
+        shutil.rmtree(_tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fail-pages", type=int, default=60, help="requests served before the outage")
+    add_board_args(parser)
+    args = parser.parse_args()
+    run(args)
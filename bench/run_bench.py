@@ -0,0 +1,160 @@
+"""
+Offline benchmark: the real fetch → parse → aggregate → table path against the
+local mock monday API (bench/mock_monday.py), so a change can be measured
+without a token or network, at sizes the real boards haven't reached yet.
+
+    python bench/run_bench.py                          # 10k pledges, defaults
+    python bench/run_bench.py --pledges 100000 --gifts-old 400000 --latency-ms 40
+    python bench/run_bench.py --streaming --json > after.json
+    python bench/run_bench.py --url http://127.0.0.1:8765/v2 --trace-fetch   # mock in its own process
+
+Each stage reports wall time, peak Python heap (tracemalloc) and rows/s. The
+fetch stages are only traced with --trace-fetch: tracemalloc slows them a lot
+and, with the in-process mock, also counts the mock's own allocations.
+Client counters (requests, retries, throttle waits) come from MondayClient.stats().
+"""
+
+import os, sys, json, time, tempfile, argparse, tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Must be set before monday_to_df is imported (it reads them at import time)
+_tmp = tempfile.mkdtemp(prefix="region-rev-bench-")
+os.environ.setdefault("MONDAY_API_TOKEN", "bench")
+os.environ["MONDAY_CACHE_DIR"] = os.path.join(_tmp, "cache")
+os.environ["REGION_REV_SNAPSHOT_DIR"] = os.path.join(_tmp, "snapshots")
+os.environ["REGION_REV_HISTORY_DIR"] = os.path.join(_tmp, "history")  # never the app's own history
+
+import monday_to_df as m  # noqa: E402
+import report  # noqa: E402
+from monday_client import json_loads  # noqa: E402
+from mock_monday import serve, add_board_args, mock_from_args  # noqa: E402
+
+
+def measure(name, fn, rows_of=None, trace=True):
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    wall = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    rows = rows_of(out) if rows_of else None
+    return out, {
+        "stage": name,
+        "wall_s": round(wall, 4),
+        "peak_mb": round(peak / 1e6, 1),
+        "rows": rows,
+        "rows_per_s": round(rows / wall) if rows and wall > 0 else None,
+    }
+
+
+def run(args):
+    mock, server, url = None, None, args.url
+    if url is None:
+        mock = mock_from_args(args)
+        server, url = serve(mock)
+    m.client.api_url = url
+    m.client.loads = json.loads if args.decoder == "json" else json_loads
+    m.client.reset_stats()
+    trace = args.trace_fetch
+    outputs = m.TABLE_REPORTS + tuple(o for o in args.outputs.split(",") if o)
+    need = m.fields_for(outputs)
+    results = []
+
+    try:
+        if args.streaming:
+            snapshot, r = measure("fetch+parse (streaming)", lambda: m.stream_snapshot(outputs), trace=trace,
+                                  rows_of=lambda s: len(s["pledges_df"]) + len(s["all_gifts_df"]))
+            results.append(r)
+        else:
+            raw, r = measure("fetch", lambda: m.fetch_raw_boards(outputs), trace=trace,
+                             rows_of=lambda raw: sum(len(raw[name]) for name in m.BOARDS))
+            results.append(r)
+            if args.incremental:
+                _, r = measure("fetch (incremental)", lambda: m.fetch_raw_boards(outputs), trace=trace,
+                               rows_of=lambda raw: sum(len(raw[name]) for name in m.BOARDS))
+                results.append(r)
+            frames, r = measure("parse", lambda: {
+                "pledges_df": m.pledges_to_df(raw["pledges"], need["pledges"]),
+                "gifts25_df": m.gifts_to_df(raw["gifts_2025"], is_2025=True, wanted=need["gifts"]),
+                "gifts_old_df": m.gifts_to_df(raw["gifts_old"], is_2025=False, wanted=need["gifts"]),
+            }, rows_of=lambda f: sum(len(df) for df in f.values()))
+            results.append(r)
+            del raw
+            snapshot, r = measure("donors", lambda: m._assemble_snapshot(
+                frames["pledges_df"], frames["gifts25_df"], frames["gifts_old_df"], outputs), trace=trace,
+                rows_of=lambda s: len(s["donor_map"]))
+            results.append(r)
+        fetch_stats = m.client.stats()
+
+        pledges_df, all_gifts_df = snapshot["pledges_df"], snapshot["all_gifts_df"]
+        breakdown, r = measure("summarize_region_gifts", lambda: m.summarize_region_gifts(pledges_df, all_gifts_df),
+                               rows_of=lambda _: len(pledges_df))
+        results.append(r)
+        balances, r = measure("balances_by_region", lambda: m.balances_by_region(pledges_df, all_gifts_df),
+                              rows_of=lambda _: len(pledges_df))
+        results.append(r)
+        _, r = measure("build_table", lambda: report.build_table(breakdown, balances))
+        results.append(r)
+        cube, r = measure("build_cube", lambda: m.build_cube(pledges_df, all_gifts_df),
+                          rows_of=lambda _: len(pledges_df))
+        results.append(r)
+        sample = set(pledges_df["pledge_id"].sample(min(100, len(pledges_df)), random_state=0).astype("int64"))
+        _, r = measure("update_cube (100 pledges)", lambda: m.update_cube(cube, pledges_df, all_gifts_df, sample),
+                       rows_of=lambda _: len(sample))
+        results.append(r)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "stages": results,
+        "client": fetch_stats,
+        "mock": dict(mock.stats) if mock else None,
+        "frame_mb": {
+            "pledges_df": round(pledges_df.memory_usage(deep=True).sum() / 1e6, 1),
+            "all_gifts_df": round(all_gifts_df.memory_usage(deep=True).sum() / 1e6, 1),
+        },
+    }
+
+
+def print_table(out):
+    print(f"{'stage':<26}{'wall s':>10}{'peak MB':>10}{'rows':>10}{'rows/s':>12}")
+    for r in out["stages"]:
+        rows = "" if r["rows"] is None else r["rows"]
+        rps = "" if r["rows_per_s"] is None else r["rows_per_s"]
+        print(f"{r['stage']:<26}{r['wall_s']:>10.3f}{r['peak_mb']:>10.1f}{rows:>10}{rps:>12}")
+    c, mk = out["client"], out["mock"]
+    print(f"\nrequests {c['requests']}  retries {c['retries']}  throttle waits {c['throttle_waits']} "
+          f"({c['throttle_wait_seconds']:.1f}s)  complexity {c['complexity_used']:,}")
+    print(f"received {c['bytes_received'] / 1e6:.1f} MB on the wire, {c['bytes_decoded'] / 1e6:.1f} MB of JSON, "
+          f"decoded in {c['decode_seconds']:.2f}s")
+    if mk:
+        per_item = lambda n: f"{n / max(mk['items_served'], 1):.0f} B/item"
+        print(f"mock: {mk['items_served']:,} items, {mk['bytes_sent'] / 1e6:.1f} MB sent ({per_item(mk['bytes_sent'])}; "
+              f"{per_item(mk['bytes_json'])} as JSON), {mk['throttled']} 429s")
+    print(f"frames: pledges {out['frame_mb']['pledges_df']} MB, gifts {out['frame_mb']['all_gifts_df']} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_board_args(parser)
+    parser.add_argument("--streaming", action="store_true", help="fused fetch+parse (MONDAY_STREAMING)")
+    parser.add_argument("--outputs", default="", help="extra outputs besides the table, e.g. donor_map,details")
+    parser.add_argument("--incremental", action="store_true", help="also time a second, incremental fetch")
+    parser.add_argument("--decoder", choices=("fast", "json"), default="fast",
+                        help="response decoder: orjson when installed (fast) or the json module")
+    parser.add_argument("--trace-fetch", action="store_true", help="tracemalloc the network stages too")
+    parser.add_argument("--url", help="use an already running mock (board options are then ignored)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    out = run(args)
+    if args.json:
+        print(json.dumps(out, indent=2))
+    else:
+        print_table(out)
@@ -0,0 +1,88 @@
+"""
+Page checkpoints for long board fetches.
+
+While a board is paged through, every page is appended to a JSON-lines file
+next to the item store, together with the cursor that follows it. If the
+fetch dies part way (a network blip, 429s past the retry budget, a restart),
+the next attempt reads the pages back and carries on from there instead of
+from page one. The file is removed once the fetch completes.
+
+    pages-<key>.jsonl   {"started_at": ...}                               header
+                        {"saved_at": ..., "cursor": ..., "items": [...]}  one line per page
+
+Appending keeps the cost per page constant; a line torn by a crash is simply
+ignored on load (that page is fetched again).
+"""
+
+import os, json, time, threading
+
+
+class PageCheckpoints:
+    def __init__(self, root: str, max_age: float = 6 * 3600):
+        self.root = root
+        self.max_age = max_age  # seconds; older pages are too stale to resume from
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"pages-{key}.jsonl")
+
+    def load(self, key: str):
+        """
+        Return {"started_at", "saved_at", "cursor", "items", "pages"} of an
+        unfinished fetch, or None if there is none (or it is older than max_age).
+        `cursor` is the one after the last saved page (None: every page is in).
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        state = None
+        for line in lines:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # torn write: everything before it is still good
+            if state is None:
+                if "started_at" not in rec:
+                    break
+                state = {"started_at": rec["started_at"], "saved_at": None, "cursor": None, "items": [], "pages": 0}
+                continue
+            state["items"].extend(rec["items"])
+            state["cursor"], state["saved_at"] = rec["cursor"], rec["saved_at"]
+            state["pages"] += 1
+        if state is None or not state["pages"] or time.time() - state["saved_at"] > self.max_age:
+            self.finish(key)
+            return None
+        return state
+
+    def started_at(self, key: str):
+        """The header's started_at of an unfinished fetch (without reading its pages), or None."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.loads(f.readline()).get("started_at")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def start(self, key: str, started_at: str):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, open(self._path(key), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"started_at": started_at}) + "\n")
+
+    def append(self, key: str, items: list, cursor):
+        line = json.dumps({"saved_at": time.time(), "cursor": cursor, "items": items})
+        with self._lock, open(self._path(key), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def finish(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if name.startswith("pages-") and name.endswith(".jsonl"):
+                os.remove(os.path.join(self.root, name))
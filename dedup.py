@@ -0,0 +1,194 @@
+"""
+Fuzzy deduplication of people across the Donors board and pledge contacts.
+
+Comparing every record with every other is O(n²), which the donor board is far
+too big for. Records are grouped by blocking keys instead, and only records
+that share a block are ever compared:
+
+    email     normalised address            exact key: a shared one is a match
+    phone     last 10 digits (both phones)  exact key: a shared one is a match
+    zip       5-digit zip + surname initial fuzzy block
+    name      each name token (3+ chars)    fuzzy block
+
+Within a fuzzy block all names are scored in one rapidfuzz process.cdist call
+(on every core for big blocks). A pair scoring >= NAME_SCORE is a match if the
+two records also have the same zip or, when a zip is missing, nearly the same
+street address. Matches are merged with union-find; a cluster's id is the
+smallest monday item id in it, so it stays put as long as that record does.
+
+    people = people_from(donor_map, pledges_df)
+    clusters = cluster_people(people)   # item_id, source, cluster_id, cluster_size
+"""
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+NAME_SCORE = 90        # fuzz.token_sort_ratio on normalised names, 0-100
+ADDRESS_SCORE = 90     # fuzz.ratio on normalised street lines
+MAX_BLOCK = 2_000      # bigger blocks (a very common first name) are skipped; other keys still apply
+PARALLEL_BLOCK = 256   # blocks at least this big are scored with workers=-1
+NAME_STOP_WORDS = ["mr", "mrs", "ms", "miss", "dr", "rev", "jr", "sr", "and", "the", "family", "of"]
+
+CLUSTER_COLUMNS = ["item_id", "source", "cluster_id", "cluster_size"]
+
+
+def people_from(donor_map=None, pledges_df=None) -> pd.DataFrame:
+    """
+    One row per person record: donors from the donor map ({id: {donor_name,
+    email, phone, addr_lines}}) and pledges from the pledge frame's contact
+    columns (name, email, phone, second_phone, addr_lines, zip).
+    """
+    parts = []
+    if donor_map:
+        donors = pd.DataFrame.from_dict(donor_map, orient="index")
+        parts.append(pd.DataFrame({
+            "item_id": donors.index.astype("int64"),
+            "source": "donor",
+            "name": donors["donor_name"].to_numpy(object),
+            "email": donors["email"].to_numpy(object),
+            "phone": donors["phone"].to_numpy(object),
+            "phone2": None,
+            "addr": donors["addr_lines"].to_numpy(object),
+            "zip": None,
+        }))
+    if pledges_df is not None and len(pledges_df):
+        missing = {"name", "email", "phone", "second_phone", "addr_lines", "zip"} - set(pledges_df.columns)
+        if missing:
+            raise ValueError(f"pledges_df lacks contact columns {sorted(missing)} (fetch the donor_clusters output)")
+        parts.append(pd.DataFrame({
+            "item_id": pledges_df["pledge_id"].to_numpy("int64"),
+            "source": "pledge",
+            "name": pledges_df["name"].to_numpy(object),
+            "email": pledges_df["email"].to_numpy(object),
+            "phone": pledges_df["phone"].to_numpy(object),
+            "phone2": pledges_df["second_phone"].to_numpy(object),
+            "addr": pledges_df["addr_lines"].to_numpy(object),
+            "zip": pledges_df["zip"].to_numpy(object),
+        }))
+    if not parts:
+        return pd.DataFrame(columns=["item_id", "source", "name", "email", "phone", "phone2", "addr", "zip"])
+    return pd.concat(parts, ignore_index=True)
+
+
+def normalize(people: pd.DataFrame) -> pd.DataFrame:
+    """Comparison keys per record ("" where a field is missing or unusable)."""
+    text = lambda col: people[col].astype(object).where(people[col].notna(), "").astype(str)
+    email = text("email").str.strip().str.lower()
+    digits = lambda col: text(col).str.replace(r"\D", "", regex=True).str[-10:]
+    phone, phone2 = digits("phone"), digits("phone2")
+
+    name = (text("name").str.lower().str.replace(r"[^a-z0-9 ]+", " ", regex=True)
+            .str.split().map(lambda ts: " ".join(t for t in ts if t not in NAME_STOP_WORDS)))
+    addr = text("addr").str.lower().str.replace(r"[^a-z0-9 ]+", " ", regex=True).str.split().str.join(" ")
+    zip_ = text("zip").str.extract(r"(\d{5})", expand=False)
+    zip_ = zip_.fillna(addr.str.extract(r"(\d{5})(?: \d{4})?$", expand=False)).fillna("")
+    return pd.DataFrame({
+        "email": email.where(email.str.contains("@", regex=False), ""),
+        "phone": phone.where(phone.str.len() >= 7, ""),
+        "phone2": phone2.where(phone2.str.len() >= 7, ""),
+        "name": name,
+        "addr": addr,
+        "zip": zip_,
+    })
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    def roots(self):
+        return np.array([self.find(i) for i in range(len(self.parent))], dtype="int64")
+
+
+def _key_table(norm, columns):
+    """Long (key, row) table over one or more key columns, empty keys dropped."""
+    frames = [pd.DataFrame({"key": norm[c].to_numpy(object), "row": np.arange(len(norm))}) for c in columns]
+    keys = pd.concat(frames, ignore_index=True)
+    return keys[keys["key"] != ""].drop_duplicates()
+
+
+def _fuzzy_blocks(norm):
+    """Row arrays of every fuzzy block (2..MAX_BLOCK records with a name)."""
+    named = norm["name"] != ""
+    initial = norm["name"].str.split().str[-1].str[:1].fillna("")
+    zip_key = ("z:" + norm["zip"] + ":" + initial).where(named & (norm["zip"] != ""), "")
+    tokens = norm["name"].str.split().explode()
+    tokens = tokens[tokens.str.len() >= 3]
+    keys = pd.concat([
+        pd.DataFrame({"key": zip_key.to_numpy(object), "row": np.arange(len(norm))}),
+        pd.DataFrame({"key": ("t:" + tokens).to_numpy(object), "row": tokens.index.to_numpy("int64")}),
+    ], ignore_index=True)
+    keys = keys[keys["key"] != ""].drop_duplicates()
+    sizes = keys.groupby("key")["row"].transform("size")
+    keys = keys[(sizes >= 2) & (sizes <= MAX_BLOCK)]
+    return [rows.to_numpy("int64") for _, rows in keys.groupby("key")["row"]]
+
+
+def _name_pairs(norm):
+    """(a, b) row pairs, a < b, whose names score >= NAME_SCORE within some block."""
+    names = norm["name"].to_numpy(object)
+    found = []
+    for rows in _fuzzy_blocks(norm):
+        block = names[rows].tolist()
+        scores = process.cdist(block, block, scorer=fuzz.token_sort_ratio, score_cutoff=NAME_SCORE,
+                               dtype=np.uint8, workers=-1 if len(rows) >= PARALLEL_BLOCK else 1)
+        i, j = np.nonzero(np.triu(scores, 1))
+        if len(i):
+            found.append(np.stack([rows[i], rows[j]], axis=1))
+    if not found:
+        return np.empty((0, 2), dtype="int64")
+    pairs = np.sort(np.concatenate(found), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def _confirmed(norm, pairs):
+    """Name matches that also agree on zip, or (zip unknown on a side) on the street address."""
+    if not len(pairs):
+        return pairs
+    zips, addrs = norm["zip"].to_numpy(object), norm["addr"].to_numpy(object)
+    a, b = pairs[:, 0], pairs[:, 1]
+    known = (zips[a] != "") & (zips[b] != "")
+    ok = known & (zips[a] == zips[b])
+    for k in np.flatnonzero(~known):
+        x, y = addrs[a[k]], addrs[b[k]]
+        ok[k] = bool(x and y) and fuzz.ratio(x, y) >= ADDRESS_SCORE
+    return pairs[ok]
+
+
+def cluster_people(people: pd.DataFrame) -> pd.DataFrame:
+    """Cluster id (smallest item id in the cluster) and cluster size per record of people_from()."""
+    if people.empty:
+        return pd.DataFrame(columns=CLUSTER_COLUMNS)
+    people = people.reset_index(drop=True)  # rows are addressed by position below
+    norm = normalize(people)
+    uf = _UnionFind(len(people))
+
+    # Exact keys: everyone sharing an email or a phone (either phone column) is one person
+    for columns in (["email"], ["phone", "phone2"]):
+        keys = _key_table(norm, columns)
+        first = keys.groupby("key")["row"].transform("min").to_numpy("int64")
+        for row, root in zip(keys["row"].to_numpy("int64"), first):
+            if row != root:
+                uf.union(row, root)
+
+    for a, b in _confirmed(norm, _name_pairs(norm)):
+        uf.union(a, b)
+
+    out = people[["item_id", "source"]].copy()
+    roots = pd.Series(uf.roots(), index=out.index)
+    out["cluster_id"] = out["item_id"].groupby(roots).transform("min").astype("int64")
+    out["cluster_size"] = roots.groupby(roots).transform("size").astype("int64")
+    return out.reset_index(drop=True)
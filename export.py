@@ -0,0 +1,114 @@
+"""
+Headless export of the regional table and the two report frames, for cron
+jobs and other systems. Streamlit is never imported.
+
+    python export.py                                  # latest snapshot -> ./export/*.csv
+    python export.py --format csv,parquet,xlsx --out /data/region-rev
+    python export.py --refresh                        # run the pipeline first
+    python export.py --max-age 60                     # ...only if the snapshot is over an hour old
+    python export.py --table-only --format csv --out -    # table as CSV on stdout
+
+Files written (one per format): regional_table, region_rev_breakdown and
+region_balances; XLSX puts all three in one workbook (region_rev.xlsx, needs
+openpyxl). From a saved snapshot nothing but the memory-mapped report frames
+is read, so an export takes well under a second.
+"""
+
+import os, sys, time, argparse
+from datetime import datetime, timezone
+
+import pandas as pd
+
+try:
+    import openpyxl  # only for --format xlsx
+except ImportError:
+    openpyxl = None
+
+import monday_to_df
+from report import build_table
+
+FORMATS = ("csv", "parquet", "xlsx")
+WORKBOOK = "region_rev.xlsx"
+
+
+def snapshot_age_minutes(manifest) -> float:
+    created = datetime.fromisoformat(manifest["created_at"])
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created).total_seconds() / 60
+
+
+def load_reports(refresh: bool = False, max_age: float = None, version: str = None):
+    """(reports, manifest): a saved version as is, or a fresh pipeline run if asked / none exists / too old."""
+    if version is None:
+        manifest = monday_to_df.snapshot_store.read_manifest()
+        stale = manifest is not None and max_age is not None and snapshot_age_minutes(manifest) > max_age
+        if refresh or manifest is None or stale:
+            version = monday_to_df.refresh_snapshot()
+    return monday_to_df.read_persisted_reports(version), monday_to_df.snapshot_store.read_manifest(version)
+
+
+def export_frames(frames: dict, out_dir: str, formats) -> list:
+    """Write {name: DataFrame} in each format; returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        if fmt == "xlsx":
+            path = os.path.join(out_dir, WORKBOOK)
+            with pd.ExcelWriter(path) as writer:
+                for name, df in frames.items():
+                    df.to_excel(writer, sheet_name=name[:31], index=name == "regional_table")
+            paths.append(path)
+            continue
+        for name, df in frames.items():
+            path = os.path.join(out_dir, f"{name}.{fmt}")
+            if fmt == "csv":
+                df.to_csv(path, index=name == "regional_table")
+            else:
+                df.to_parquet(path, index=name == "regional_table")
+            paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="export", help="output directory, or - for CSV on stdout")
+    parser.add_argument("--format", default="csv", help=f"comma-separated, any of {', '.join(FORMATS)}")
+    parser.add_argument("--refresh", action="store_true", help="run the pipeline against monday first")
+    parser.add_argument("--max-age", type=float, metavar="MINUTES",
+                        help="run the pipeline first if the latest snapshot is older than this")
+    parser.add_argument("--version", help="export this saved snapshot version instead of the latest")
+    parser.add_argument("--table-only", action="store_true", help="skip the breakdown and balances frames")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown format(s) {sorted(unknown)}; expected some of {', '.join(FORMATS)}")
+    if "xlsx" in formats and args.out != "-" and openpyxl is None:
+        parser.error("--format xlsx needs openpyxl (pip install openpyxl)")
+    if args.version and (args.refresh or args.max_age is not None):
+        parser.error("--version exports a saved snapshot; it can't be combined with --refresh / --max-age")
+
+    t0 = time.perf_counter()
+    reports, manifest = load_reports(args.refresh, args.max_age, args.version)
+    frames = {"regional_table": build_table(reports["region_rev_breakdown"], reports["region_balances"])}
+    if not args.table_only:
+        frames.update(reports)
+
+    if args.out == "-":
+        for name, df in frames.items():
+            if len(frames) > 1:
+                print(f"# {name}")
+            df.to_csv(sys.stdout, index=name == "regional_table")
+        paths = []
+    else:
+        paths = export_frames(frames, args.out, formats)
+    print(f"snapshot {manifest['version']} ({snapshot_age_minutes(manifest):.0f} min old): "
+          f"{len(paths)} file(s) in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    for path in paths:
+        print(f"  {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Declarative item filters for board fetches.
+
+A filter names a parsed field (e.g. "mapped_class", "linked_gift_ids") or a raw
+monday column id (e.g. "date"). compile_filters() turns a board's filters into
+items_page `query_params` rules wherever monday can evaluate them, and a local
+predicate on the raw items for the rest, so only what monday can't filter is
+transferred and then dropped here (before parsing). A filter's rule(column_id)
+gives the monday rules that express it ([] if there are none) and test(value)
+the local check.
+
+    BOARD_FILTERS = {"gifts_old": [DateRange("date", after="2024-01-01")]}
+    REGION_REV_FILTERS='{"pledges": [{"field": "linked_gift_ids", "not_empty": true}]}'
+"""
+
+import json
+from datetime import date, datetime
+
+ITEM_SOURCES = ("id", "name", "group")  # item-level sources; not column ids monday rules accept here
+
+
+def _to_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (date, datetime)):
+        return value if isinstance(value, date) and not isinstance(value, datetime) else value.date()
+    return date.fromisoformat(str(value)[:10])
+
+
+class DateRange:
+    """Items whose date column is after and/or before the given days (exclusive unless inclusive=True)."""
+
+    def __init__(self, field, after=None, before=None, inclusive=False):
+        self.field = field
+        self.after = _to_date(after)
+        self.before = _to_date(before)
+        self.inclusive = inclusive
+
+    def rule(self, column_id):
+        if self.after and self.before and self.inclusive:
+            return [{"column_id": column_id, "operator": "between",
+                     "compare_value": [self.after.isoformat(), self.before.isoformat()]}]
+        rules = []  # exclusive on both ends has no single monday operator: one rule per end, AND-ed
+        if self.after:
+            rules.append({"column_id": column_id, "compare_value": ["EXACT", self.after.isoformat()],
+                          "operator": "greater_than_or_equals" if self.inclusive else "greater_than"})
+        if self.before:
+            rules.append({"column_id": column_id, "compare_value": ["EXACT", self.before.isoformat()],
+                          "operator": "lower_than_or_equal" if self.inclusive else "lower_than"})
+        return rules
+
+    def test(self, value):
+        d = _to_date(value)
+        if d is None:
+            return False
+        if self.after and (d < self.after if self.inclusive else d <= self.after):
+            return False
+        if self.before and (d > self.before if self.inclusive else d >= self.before):
+            return False
+        return True
+
+
+class AnyOf:
+    """
+    Items whose label is one of `values` (mapped-class sets, group titles...).
+    monday matches dropdown/status/group rules on label or group *ids*, not
+    the text we parse, so this one runs locally.
+    """
+
+    def __init__(self, field, values):
+        self.field = field
+        self.values = {str(v).strip() for v in values}
+
+    def rule(self, column_id):
+        return []
+
+    def test(self, value):
+        return (value or "").strip() in self.values
+
+
+class NotEmpty:
+    """Items where the column has a value, e.g. pledges that have linked gifts."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def rule(self, column_id):
+        return [{"column_id": column_id, "compare_value": [], "operator": "is_not_empty"}]
+
+    def test(self, value):
+        return bool(value)
+
+
+def from_spec(spec: dict):
+    """One filter from its JSON form: {"field": ..., "after"/"before"/"any_of"/"not_empty": ...}."""
+    spec = dict(spec)
+    field = spec.pop("field")
+    if "any_of" in spec:
+        return AnyOf(field, spec["any_of"])
+    if spec.get("not_empty"):
+        return NotEmpty(field)
+    if "after" in spec or "before" in spec:
+        return DateRange(field, spec.get("after"), spec.get("before"), spec.get("inclusive", False))
+    raise ValueError(f"Unrecognised filter spec for {field!r}: {spec}")
+
+
+def filters_from_env(raw: str):
+    """{board name: [filters]} from the REGION_REV_FILTERS JSON (empty if unset)."""
+    if not raw:
+        return {}
+    return {board: [from_spec(s) for s in specs] for board, specs in json.loads(raw).items()}
+
+
+def compile_filters(filters, fields, getter, query_params=None):
+    """
+    Split a board's filters into server rules and a local check.
+
+    `fields` are the board's (name, type, source) tuples and getter(field) gives
+    the function reading one of them off a raw item, get(item, cv). Returns
+    (query_params, keep, local_fields): query_params with the pushed-down rules
+    and-ed onto the given ones; keep(item) -> bool for the rest (None if
+    everything was pushed down); and the names of the fields keep() reads, which
+    the fetch has to select.
+    """
+    by_name = {f[0]: f for f in fields}
+    rules, local, local_fields = [], [], []
+    for flt in filters or []:
+        field = by_name.get(flt.field)
+        source = field[2] if field else flt.field  # not a parsed field: a raw column id
+        pushed = flt.rule(source) if source not in ITEM_SOURCES else []
+        if pushed:
+            rules.extend(pushed)
+        elif field is None:
+            raise ValueError(f"Filter on {flt.field!r} can't run on monday and isn't a parsed field")
+        else:
+            local.append((flt, getter(field)))
+            local_fields.append(field[0])
+
+    if rules:
+        query_params = dict(query_params or {})
+        query_params["rules"] = list(query_params.get("rules") or []) + rules
+        if len(query_params["rules"]) > 1:
+            query_params["operator"] = "and"
+
+    keep = None
+    if local:
+        def keep(item):
+            cv = {c["id"]: c for c in item.get("column_values") or []}
+            return all(flt.test(get(item, cv)) for flt, get in local)
+    return query_params, keep, local_fields
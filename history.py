@@ -0,0 +1,242 @@
+"""
+Point-in-time history of the parsed tables (pledges, gifts), one version per
+refresh, stored by change rather than by copy.
+
+Every row gets a content hash. A version stores only the rows whose hash is
+new since the previous version, in one Arrow block named by the hash of its
+contents, plus an index of which row (id, row hash) lives in which block.
+Indexes are delta-encoded too: a version's index only lists upserted and
+removed ids, with a full keyframe every `keyframe_every` versions (or when the
+columns change), so rebuilding any version reads one keyframe, a few deltas
+and just the blocks its rows live in. At a keyframe, rows scattered over many
+small blocks are copied into one, so that number stays bounded. Storage grows
+with the churn on the boards, not with the number of refreshes.
+
+    history/
+      versions.jsonl                 one line per version (tables, kinds, row counts, content hashes)
+      index/<version>/<table>.arrow  keyframe: id, row_hash, block / delta: the same plus `removed`
+      blocks/<table>/<hash>.arrow    rows first seen in some version (+ _row_hash)
+
+Rebuilt tables are sorted by id; the board order of the original is not kept.
+"""
+
+import os, json, hashlib, threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from snapshots import _frame_to_table, _table_to_frame
+
+KEYFRAME_EVERY = 30
+MAX_BLOCKS = 32  # at a keyframe, rows spread over more blocks than this are regrouped into one
+INDEX_SCHEMA = pa.schema([("id", pa.int64()), ("row_hash", pa.uint64()), ("block", pa.string()),
+                          ("removed", pa.bool_())])
+
+
+def schema_of(df: pd.DataFrame) -> dict:
+    return {col: str(dtype) for col, dtype in df.dtypes.items()}
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """uint64 content hash per row (values and column schema; list columns by their elements)."""
+    hashable = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype):
+            as_text = pc.binary_join(pc.cast(pa.array(df[col]), pa.list_(pa.string())), " ")
+            hashable[col] = pd.Series(as_text.to_pylist(), dtype=object).fillna("\x00")
+        else:
+            hashable[col] = df[col].reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(hashable), index=False).to_numpy("uint64")
+    seed = hashlib.sha1(json.dumps(schema_of(df)).encode()).digest()[:8]
+    return hashes ^ np.frombuffer(seed, dtype="uint64")[0]
+
+
+class HistoryStore:
+    def __init__(self, root: str, keyframe_every: int = KEYFRAME_EVERY, max_blocks: int = MAX_BLOCKS):
+        self.root = root
+        self.keyframe_every = keyframe_every
+        self.max_blocks = max_blocks
+        self._lock = threading.Lock()
+        self._last = {}  # table -> (version, index frame) of the newest version appended here
+        self._log = (0, [])  # (bytes of versions.jsonl parsed, entries)
+
+    # --- layout -----------------------------------------------------------------
+
+    def _log_path(self) -> str:
+        return os.path.join(self.root, "versions.jsonl")
+
+    def _index_path(self, version: str, table: str) -> str:
+        return os.path.join(self.root, "index", version, f"{table}.arrow")
+
+    def _block_path(self, table: str, block: str) -> str:
+        return os.path.join(self.root, "blocks", table, f"{block}.arrow")
+
+    @staticmethod
+    def _write(table: pa.Table, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        feather.write_feather(table, f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+
+    def versions(self) -> list:
+        """Every version's entry, oldest first (the log is only appended to, so just new lines are parsed)."""
+        try:
+            with open(self._log_path(), "rb") as f:
+                read_to, entries = self._log
+                if os.fstat(f.fileno()).st_size < read_to:  # a new history in the same place
+                    read_to, entries = 0, []
+                f.seek(read_to)
+                tail = f.read()
+        except FileNotFoundError:
+            return []
+        if tail:
+            complete = tail[:tail.rfind(b"\n") + 1]
+            entries = entries + [json.loads(line) for line in complete.splitlines() if line.strip()]
+            self._log = (read_to + len(complete), entries)
+        return list(entries)
+
+    def version_at(self, when) -> str:
+        """The newest version created at or before `when` (datetime or iso str), or None."""
+        when = datetime.fromisoformat(when) if isinstance(when, str) else when
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        found = None
+        for entry in self.versions():
+            if datetime.fromisoformat(entry["created_at"]) <= when:
+                found = entry["version"]
+        return found
+
+    # --- writing ----------------------------------------------------------------
+
+    def append(self, version: str, frames: dict, keys: dict, created_at: str = None) -> dict:
+        """
+        Record {table: DataFrame} as `version` (keys: {table: id column});
+        returns its log entry. Appending a version that is already there is a no-op.
+        """
+        with self._lock:
+            log = self.versions()
+            for entry in log:
+                if entry["version"] == version:
+                    return entry
+            prev = log[-1] if log else None
+            entry = {"version": version, "created_at": created_at or datetime.now(timezone.utc).isoformat(),
+                     "tables": {}}
+            indexes = {}
+            for table, df in frames.items():
+                prev_meta = (prev or {}).get("tables", {}).get(table)
+                prev_index = self._index(log, prev["version"], table) if prev_meta else None
+                if prev_meta and prev_meta["schema"] != schema_of(df):
+                    prev_meta = prev_index = None  # columns changed: every row is new, start a new chain
+                entry["tables"][table], indexes[table] = self._append_table(
+                    version, table, df, keys[table], prev_meta, prev_index)
+
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._log_path(), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._last = {table: (version, index) for table, index in indexes.items()}
+            return entry
+
+    def _append_table(self, version, table, df, key, prev_meta, prev_index):
+        ids = df[key].to_numpy("int64")
+        index = pd.DataFrame({"id": ids, "row_hash": row_hashes(df)})
+        if prev_index is not None:
+            index = index.merge(prev_index, on=["id", "row_hash"], how="left")
+        else:
+            index["block"] = None
+        new = index["block"].isna().to_numpy()
+        chain = 0 if prev_meta is None else prev_meta["chain"] + 1
+        kind = "key" if prev_meta is None or chain >= self.keyframe_every else "delta"
+
+        # Rows written now: the new ones, plus at a keyframe those outside the biggest blocks if there are too many
+        write = new
+        if kind == "key" and index["block"].nunique() > self.max_blocks:
+            biggest = index["block"].value_counts().index[:self.max_blocks // 2]
+            write = new | ~index["block"].isin(biggest).to_numpy()
+        block = None
+        if write.any():
+            hashes = index["row_hash"].to_numpy()[write]
+            block = hashlib.sha1(np.sort(hashes).tobytes()).hexdigest()[:16]
+            path = self._block_path(table, block)
+            if not os.path.exists(path):  # identical rows already stored under the same name
+                rows = df.reset_index(drop=True)[write].assign(_row_hash=hashes)
+                self._write(_frame_to_table(rows), path)
+            index.loc[write, "block"] = block
+
+        if kind == "key":
+            chain = 0
+            stored = index.assign(removed=False)
+        else:
+            removed = np.setdiff1d(prev_index["id"].to_numpy(), ids)
+            stored = pd.concat([
+                index[new].assign(removed=False),
+                pd.DataFrame({"id": removed, "row_hash": np.zeros(len(removed), "uint64"),
+                              "block": None, "removed": True}),
+            ], ignore_index=True)
+        self._write(pa.Table.from_pandas(stored, schema=INDEX_SCHEMA, preserve_index=False),
+                    self._index_path(version, table))
+
+        content = index[["id", "row_hash"]].sort_values("id").to_numpy("uint64").tobytes()
+        meta = {
+            "kind": kind, "chain": chain, "key": key, "rows": len(index), "new_rows": int(new.sum()),
+            "block": block, "block_rows": int(write.sum()), "schema": schema_of(df), "content_hash": hashlib.sha1(content).hexdigest(),
+        }
+        return meta, index[["id", "row_hash", "block"]]
+
+    # --- reading ----------------------------------------------------------------
+
+    def _read_index(self, version, table) -> pa.Table:
+        return feather.read_table(self._index_path(version, table))
+
+    def _index(self, log, version, table) -> pd.DataFrame:
+        """(id, row_hash, block) of every row of `table` in `version`: its keyframe plus the deltas after it."""
+        cached = self._last.get(table)
+        if cached and cached[0] == version:
+            return cached[1]
+        at = next(i for i, entry in enumerate(log) if entry["version"] == version)
+        start = at
+        while log[start]["tables"][table]["kind"] != "key":
+            start -= 1
+        stored = pa.concat_tables([self._read_index(entry["version"], table) for entry in log[start:at + 1]])
+        # Later entries win: keep each id's last occurrence, then drop the ids it removed
+        ids = stored["id"].to_numpy()
+        order = np.lexsort((np.arange(len(ids)), ids))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = ids[order][1:] != ids[order][:-1]
+        keep = order[last & ~stored["removed"].to_numpy()[order]]
+        return stored.select(["id", "row_hash", "block"]).take(keep).to_pandas()
+
+    def read(self, version: str, tables=None) -> dict:
+        """{table: DataFrame} as they were in `version` (rows sorted by id)."""
+        log = self.versions()
+        entry = next((e for e in log if e["version"] == version), None)
+        if entry is None:
+            raise KeyError(f"no history version {version!r}")
+        out = {}
+        for table in tables or entry["tables"]:
+            meta = entry["tables"][table]
+            index = self._index(log, version, table)
+            parts = []
+            for block, hashes in index.groupby("block")["row_hash"]:
+                stored = feather.read_table(self._block_path(table, block), memory_map=True)
+                parts.append(stored.filter(pc.is_in(stored["_row_hash"], pa.array(hashes.to_numpy()))))
+            if not parts:
+                out[table] = pd.DataFrame(columns=list(meta["schema"]))
+                continue
+            # One Arrow table, one conversion (blocks differ only in their pandas metadata and dictionaries)
+            rows = pa.concat_tables([part.replace_schema_metadata(parts[0].schema.metadata) for part in parts],
+                                    promote_options="permissive")
+            df = _table_to_frame(rows.sort_by(meta["key"])).drop(columns="_row_hash")
+            for col, dtype in meta["schema"].items():
+                if dtype == "category" and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype("category")
+            out[table] = df
+        return out
+
+    def storage_bytes(self) -> int:
+        total = 0
+        for base, _, files in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(base, name)) for name in files)
+        return total
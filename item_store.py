@@ -0,0 +1,52 @@
+"""
+Local snapshot of raw monday items, keyed by board and item id.
+
+Each entry holds the item dict exactly as the API returned it (including its
+`updated_at` marker) plus the time of the last successful sync, so a refresh
+only has to ask monday for what changed since then, and the number of syncs
+since the board's ids were last listed (deletions are only found that way).
+"""
+
+import os, json, hashlib, threading
+
+
+class ItemStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(board_id, column_ids=None, query_params=None, item_fields=None) -> str:
+        """A snapshot is only reusable for the same board *and* the same selection."""
+        sel = {"columns": column_ids, "query_params": query_params}
+        if item_fields is not None:
+            sel["item_fields"] = sorted(item_fields)
+        sel = json.dumps(sel, sort_keys=True)
+        return f"{board_id}-{hashlib.sha1(sel.encode()).hexdigest()[:12]}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"items-{key}.json")
+
+    def load(self, key: str):
+        """Return {"synced_at": iso str, "items": {item_id: item}, "unchecked_syncs": int} or None."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, key: str, synced_at: str, items_by_id: dict, unchecked_syncs: int = 0):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"synced_at": synced_at, "items": items_by_id, "unchecked_syncs": unchecked_syncs}, f)
+            os.replace(tmp, path)  # readers never see a half-written snapshot
+
+    def clear(self):
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if name.startswith("items-") and name.endswith(".json"):
+                os.remove(os.path.join(self.root, name))
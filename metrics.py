@@ -0,0 +1,252 @@
+"""
+Per-stage pipeline instrumentation.
+
+A refresh is one run (`with metrics.run("pipeline"):`) made of stages
+(`with metrics.stage("fetch", board="pledges") as s:`). Everything counted
+while a stage is active lands on that stage and on every stage around it,
+including monday requests made by MondayClient (requests, bytes, complexity,
+retries, throttle waits). Work handed to a thread pool keeps its stage if it is
+submitted with metrics.submit().
+
+Memory per stage is rss_delta_mb, the change in resident memory from the
+stage's start to its end (what it left allocated; stages that run side by side,
+like the board fetches, see each other's). peak_rss_mb is the process
+high-water mark when the stage ended, the same for every stage after the
+heaviest one.
+
+Finished stages and runs are logged as one JSON line each (logger
+"region_rev.metrics"), and the last run is rendered in Prometheus text format,
+written to REGION_REV_METRICS_FILE and/or served by serve(port) at /metrics.
+"""
+
+import os, sys, json, time, logging, threading, contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource  # Unix only; peak RSS is left out elsewhere
+except ImportError:
+    resource = None
+
+COUNTERS = (
+    "requests", "pages", "bytes_received", "bytes_decoded", "complexity_used", "retries", "errors",
+    "throttle_waits", "throttle_wait_seconds", "backoff_seconds", "request_seconds", "decode_seconds",
+    "pages_resumed",
+)
+
+PROM_FILE = os.getenv("REGION_REV_METRICS_FILE")  # e.g. a node_exporter textfile dir
+
+logger = logging.getLogger("region_rev.metrics")
+if not logger.handlers and not logging.getLogger().handlers:
+    # Nothing configured logging (plain script / Streamlit): print the JSON lines to stderr
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_stack = contextvars.ContextVar("metrics_stack", default=())
+_run = contextvars.ContextVar("metrics_run", default=None)
+_lock = threading.Lock()
+_last_run = None
+_totals = {"runs": 0, "failures": 0}
+
+
+def _peak_rss_mb():
+    """Process memory high-water mark so far (not reset between stages)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)  # bytes on macOS, KiB elsewhere
+
+
+def _rss_mb():
+    """Current resident set size (Linux only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+
+def _rss_delta(start):
+    end = _rss_mb()
+    return None if start is None or end is None else round(end - start, 1)
+
+
+def _record(name, labels):
+    return {"stage": name, "labels": labels, "wall_s": None, "rows": None,
+            **dict.fromkeys(COUNTERS, 0), "rss_delta_mb": None, "peak_rss_mb": None}
+
+
+class RunMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.status = "running"
+        self.total = _record(name, {})
+        self.stages = []
+
+    def as_dict(self) -> dict:
+        with _lock:
+            return {
+                "run": self.name,
+                "started_at": self.started_at,
+                "status": self.status,
+                "total": dict(self.total),
+                "stages": [dict(s) for s in self.stages],
+            }
+
+
+def count(**deltas):
+    """Add to the counters of every active stage (and the run) in this context."""
+    stack = _stack.get()
+    if not stack:
+        return
+    with _lock:
+        for rec in stack:
+            for key, n in deltas.items():
+                rec[key] += n
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """Time a block as a stage; the yielded dict takes extra fields such as rows."""
+    rec = _record(name, labels)
+    token = _stack.set(_stack.get() + (rec,))
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        _stack.reset(token)
+        rec["wall_s"] = round(time.perf_counter() - t0, 4)
+        rec["rss_delta_mb"] = _rss_delta(rss0)
+        rec["peak_rss_mb"] = _peak_rss_mb()
+        current = _run.get()
+        if current is not None:
+            with _lock:
+                current.stages.append(rec)
+        logger.info(json.dumps({"event": "stage", **rec}, default=str))
+
+
+@contextmanager
+def run(name: str = "pipeline"):
+    """One instrumented pipeline run; becomes last_run() once it finishes."""
+    global _last_run
+    current = RunMetrics(name)
+    run_token = _run.set(current)
+    stack_token = _stack.set((current.total,))
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    try:
+        yield current
+        current.status = "ok"
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        _stack.reset(stack_token)
+        _run.reset(run_token)
+        current.total["wall_s"] = round(time.perf_counter() - t0, 4)
+        current.total["rss_delta_mb"] = _rss_delta(rss0)
+        current.total["peak_rss_mb"] = _peak_rss_mb()
+        with _lock:
+            _totals["runs"] += 1
+            _totals["failures"] += current.status != "ok"
+            _last_run = current
+        logger.info(json.dumps({"event": "run", **current.as_dict()}, default=str))
+        if PROM_FILE:
+            write_prometheus(PROM_FILE)
+
+
+def submit(pool, fn, *args, **kwargs):
+    """pool.submit that keeps the caller's active stages (contextvars don't cross threads)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def last_run():
+    """as_dict() of the most recent finished run in this process, or None."""
+    with _lock:
+        current = _last_run
+    return current.as_dict() if current is not None else None
+
+
+# --- Prometheus text format -------------------------------------------------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(rec):
+    pairs = {"stage": rec["stage"], **rec["labels"]}
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items())
+
+
+def prometheus_text() -> str:
+    """Gauges for each stage of the last run, plus process-lifetime run counters."""
+    last = last_run()
+    with _lock:
+        totals = dict(_totals)
+    lines = [
+        "# HELP region_rev_runs_total Pipeline runs finished by this process.",
+        "# TYPE region_rev_runs_total counter",
+        f"region_rev_runs_total {totals['runs']}",
+        "# HELP region_rev_run_failures_total Pipeline runs that raised.",
+        "# TYPE region_rev_run_failures_total counter",
+        f"region_rev_run_failures_total {totals['failures']}",
+    ]
+    if last is None:
+        return "\n".join(lines) + "\n"
+
+    started = datetime.fromisoformat(last["started_at"]).timestamp()
+    lines += [
+        "# HELP region_rev_last_run_timestamp_seconds Start time of the last run.",
+        "# TYPE region_rev_last_run_timestamp_seconds gauge",
+        f"region_rev_last_run_timestamp_seconds {started:.0f}",
+        "# HELP region_rev_last_run_success 1 if the last run finished without error.",
+        "# TYPE region_rev_last_run_success gauge",
+        f"region_rev_last_run_success {int(last['status'] == 'ok')}",
+    ]
+    records = [last["total"]] + last["stages"]
+    for field in ("wall_s", "rows", *COUNTERS, "rss_delta_mb", "peak_rss_mb"):
+        metric = "region_rev_stage_" + {"wall_s": "seconds"}.get(field, field)
+        lines.append(f"# HELP {metric} Last run, per stage ({field}).")
+        lines.append(f"# TYPE {metric} gauge")
+        for rec in records:
+            if rec.get(field) is not None:
+                lines.append(f"{metric}{{{_labels(rec)}}} {rec[field]}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str):
+    """Write the exposition atomically (node_exporter's textfile collector reads it)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(f"{path}.tmp", path)
+
+
+def serve(port: int, host: str = "0.0.0.0"):
+    """Serve prometheus_text() at http://host:port/metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,251 @@
+"""
+Shared monday GraphQL client: every API request goes through MondayClient.gql.
+
+- Paces requests with a token bucket over monday's per-minute complexity
+  budget, corrected from the `complexity` block each response carries, so we
+  wait a little up front instead of running into 429s.
+- Caps in-flight requests across all threads.
+- Retries 429s, 5xx, timeouts/connection errors and complexity-budget errors
+  with jittered exponential backoff (or the server's reset hint when given).
+- Asks for gzip explicitly and decodes responses with orjson when it is
+  installed (json otherwise); pages are large and mostly repetitive JSON.
+- Counts requests, bytes (on the wire and decoded), decode time, retries and
+  throttle waits; see MondayClient.stats(). The same counts go to whichever
+  metrics stage the calling code is in.
+"""
+
+import re, json, time, random, threading
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+try:
+    import orjson  # optional: several times faster than json on big pages
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+API_URL = "https://api.monday.com/v2"
+API_VERSION = "2025-04"  # supports items_page + typed column_values; good forward-compat
+
+COMPLEXITY_PER_MINUTE = 5_000_000  # monday's budget for personal API tokens
+DEFAULT_QUERY_COST = 50_000        # assumed cost of a query shape we haven't seen yet
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class MondayAPIError(RuntimeError):
+    """GraphQL-level error returned by monday (HTTP 200 with an `errors` list)."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+_OPERATION_RE = re.compile(r"(\bquery\s*(?:\([^)]*\))?\s*\{)")
+
+@lru_cache(maxsize=256)
+def with_complexity(query: str) -> str:
+    """Ask for the complexity block alongside the query's own fields."""
+    if "complexity {" in query:
+        return query
+    return _OPERATION_RE.sub(r"\1 complexity { query after reset_in_x_seconds }", query, count=1)
+
+
+class ComplexityBucket:
+    """Token bucket over the per-minute complexity budget, shared by all threads."""
+
+    def __init__(self, capacity: int = COMPLEXITY_PER_MINUTE, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost: float) -> float:
+        """Block until `cost` tokens are available, take them; returns seconds waited."""
+        cost = min(float(cost), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = (cost - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def observe(self, remaining: float, reset_in: float = None):
+        """Trust the server: never believe we have more budget than it reports."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(remaining))
+            if reset_in is not None and remaining <= 0:
+                # Budget is exhausted until the window resets
+                self.tokens = -self.rate * float(reset_in)
+
+    def drain(self, seconds: float):
+        """Push the bucket into debt so every thread pauses ~`seconds` (after a 429)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -self.rate * seconds)
+
+
+class MondayClient:
+    def __init__(self, token_provider, max_in_flight: int = 4, max_retries: int = 6,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0,
+                 timeout=(10, 120), complexity_per_minute: int = COMPLEXITY_PER_MINUTE,
+                 api_url: str = API_URL, loads=None):
+        self._token_provider = token_provider
+        self.api_url = api_url
+        self.loads = loads or json_loads
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.bucket = ComplexityBucket(complexity_per_minute)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._session = None
+        self._lock = threading.Lock()
+        self._query_cost = {}
+        self._stats = {
+            "requests": 0,
+            "bytes_received": 0,
+            "bytes_decoded": 0,
+            "request_seconds": 0.0,
+            "decode_seconds": 0.0,
+            "retries": 0,
+            "throttle_waits": 0,
+            "throttle_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+            "complexity_used": 0,
+            "errors": 0,
+        }
+
+    @property
+    def session(self) -> requests.Session:
+        """Built (and the token resolved) on first use rather than at import."""
+        with self._lock:
+            if self._session is None:
+                s = requests.Session()
+                s.headers.update({
+                    "Authorization": self._token_provider(),
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                    "Accept-Encoding": "gzip",  # requests decompresses transparently
+                    "API-Version": API_VERSION
+                })
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                self._session = s
+            return self._session
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+        metrics.count(**{key: n})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def _backoff(self, attempt: int, hint: float = None) -> float:
+        if hint is not None:
+            return min(self.backoff_cap, hint) + random.uniform(0, self.backoff_base)
+        # "Full jitter" exponential backoff
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _observe_complexity(self, query_key, data):
+        cx = (data or {}).get("complexity") or {}
+        if cx.get("query") is not None:
+            with self._lock:
+                self._query_cost[query_key] = cx["query"]
+            self._count("complexity_used", cx["query"])
+        if cx.get("after") is not None:
+            self.bucket.observe(cx["after"], cx.get("reset_in_x_seconds"))
+
+    @staticmethod
+    def _complexity_error_wait(errors):
+        """Seconds to wait if monday says the complexity budget is exhausted, else None."""
+        for err in errors or []:
+            ext = err.get("extensions") or {}
+            code = ext.get("code") or err.get("error_code") or ""
+            msg = err.get("message") or ""
+            if "Complexity" in code or "complexity budget" in msg.lower():
+                m = re.search(r"reset in (\d+) seconds", msg)
+                return float(ext.get("retry_in_seconds") or (m.group(1) if m else 0) or 1)
+        return None
+
+    def gql(self, query: str, variables: dict = None):
+        query = with_complexity(query)
+        payload = {"query": query, "variables": variables or {}}
+
+        for attempt in range(self.max_retries):
+            waited = self.bucket.acquire(self._query_cost.get(query, DEFAULT_QUERY_COST))
+            if waited > 0:
+                self._count("throttle_waits")
+                self._count("throttle_wait_seconds", waited)
+
+            started = time.perf_counter()
+            try:
+                with self._slots:
+                    self._count("requests")
+                    resp = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError):
+                resp = None
+            self._count("request_seconds", time.perf_counter() - started)
+            if resp is not None:
+                self._count("bytes_decoded", len(resp.content))
+                self._count("bytes_received", resp.raw.tell() or len(resp.content))  # compressed size if gzipped
+
+            hint = None
+            if resp is not None and resp.status_code not in RETRY_STATUSES:
+                resp.raise_for_status()
+                started = time.perf_counter()
+                data = self.loads(resp.content)
+                self._count("decode_seconds", time.perf_counter() - started)
+                self._observe_complexity(query, data.get("data"))
+                if "errors" not in data:
+                    return data["data"]
+                wait = self._complexity_error_wait(data["errors"])
+                if wait is None:
+                    self._count("errors")
+                    raise MondayAPIError(data["errors"])
+                # Budget exhausted: put the shared bucket in debt; the next
+                # acquire() (in every thread) waits it out
+                self.bucket.drain(self._backoff(attempt, wait))
+                self._count("retries")
+                continue
+            if resp is not None:
+                retry_after = resp.headers.get("Retry-After")
+                hint = float(retry_after) if retry_after and retry_after.isdigit() else None
+                if resp.status_code == 429:
+                    self.bucket.drain(self._backoff(attempt, hint))
+                    self._count("retries")
+                    continue
+
+            # 5xx, timeout or dropped connection: back off this request only
+            if attempt + 1 < self.max_retries:
+                delay = self._backoff(attempt, hint)
+                self._count("retries")
+                self._count("backoff_seconds", delay)
+                time.sleep(delay)
+
+        self._count("errors")
+        raise RuntimeError(f"monday API request failed after {self.max_retries} attempts.")
@@ -1,79 +1,109 @@
 # If needed (uncomment and run once):
-# !pip install requests pandas rapidfuzz python-dateutil
-
-import os, time, json, math
-import requests
+# !pip install requests pandas pyarrow python-dateutil
+
+import os, sys, time, json, math, hashlib, threading
+from itertools import chain, repeat
+from operator import itemgetter
+from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz, process
+import pyarrow as pa
+import pyarrow.compute as pc
 from dateutil import tz
 
-# Optional: only import streamlit if present (so plain scripts won’t break)
-try:
-    import streamlit as st  # type: ignore
-except Exception:
-    st = None
-
-def get_monday_token() -> str:
-    # 1) Streamlit Cloud / local `.streamlit/secrets.toml`
-    if st is not None:
+import dedup
+import filters
+import metrics
+import webhooks
+from item_store import ItemStore
+from history import HistoryStore
+from snapshots import SnapshotStore
+from checkpoints import PageCheckpoints
+from monday_client import MondayClient, MondayAPIError, API_URL, COMPLEXITY_PER_MINUTE
+
+def _streamlit_secret(name: str, import_streamlit: bool):
+    """A Streamlit secret, or None. Streamlit is only imported when asked to (it is slow and pulls in the UI)."""
+    st = sys.modules.get("streamlit")
+    if st is None and import_streamlit:
         try:
-            token = st.secrets["MONDAY_API_TOKEN"]
-            if token:
-                return token
+            import streamlit as st  # type: ignore
         except Exception:
-            pass
+            return None
+    if st is None:
+        return None
+    try:
+        return st.secrets[name] or None
+    except Exception:
+        return None
+
+def get_monday_token() -> str:
+    # 1) Streamlit Cloud / local `.streamlit/secrets.toml`, when running inside the app
+    token = _streamlit_secret("MONDAY_API_TOKEN", import_streamlit=False)
+    if token:
+        return token
 
     # 2) Standard environment variable
     token = os.getenv("MONDAY_API_TOKEN")
     if token:
         return token
 
-    # 3) Fail fast — do NOT default to a literal
+    # 3) Scripts without the env var can still use `.streamlit/secrets.toml`
+    token = _streamlit_secret("MONDAY_API_TOKEN", import_streamlit=True)
+    if token:
+        return token
+
+    # 4) Fail fast — do NOT default to a literal
     raise RuntimeError(
         "MONDAY_API_TOKEN is not set. Define it in Streamlit secrets or as an env var."
     )
 
-MONDAY_API_TOKEN = get_monday_token()
-API_URL = "https://api.monday.com/v2"
-API_VERSION = "2025-04"  # supports items_page + typed column_values; good forward-compat
-
-session = requests.Session()
-session.headers.update({
-    "Authorization": MONDAY_API_TOKEN,
-    "Content-Type": "application/json",
-    "API-Version": API_VERSION
-})
-
-def gql(query: str, variables: dict=None, max_retries: int=5):
-    """Minimal helper with gentle retry for 429s."""
-    for attempt in range(max_retries):
-        resp = session.post(API_URL, json={"query": query, "variables": variables or {}})
-        if resp.status_code == 429:
-            time.sleep(1.5 * (attempt+1))
-            continue
-        resp.raise_for_status()
-        data = resp.json()
-        if "errors" in data:
-            raise RuntimeError(data["errors"])
-        return data["data"]
-    raise RuntimeError("Rate limited repeatedly.")
-
-# We’ll use typed column_value fragments so you can pull normalized fields per column type.
+# Boards are fetched in parallel; every request from every thread goes through
+# this one client, which shares the complexity budget and the in-flight cap.
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MONDAY_MAX_CONCURRENT_REQUESTS", "4"))
+
+client = MondayClient(
+    get_monday_token,
+    max_in_flight=MAX_CONCURRENT_REQUESTS,
+    complexity_per_minute=int(os.getenv("MONDAY_COMPLEXITY_PER_MINUTE", COMPLEXITY_PER_MINUTE)),
+    api_url=os.getenv("MONDAY_API_URL", API_URL),  # e.g. the local mock in bench/
+)
+
+def gql(query: str, variables: dict=None):
+    """Run a GraphQL query through the shared client (pacing + retries live there)."""
+    return client.gql(query, variables)
+
+# Typed column_value fragments: per column type, only the fields the getters
+# below read (get_number → number, get_board_relation_ids → linked_item_ids,
+# get_email/get_phone → email/phone, everything else → text). Every column value
+# is repeated on every item of every page, so each field here is paid for N times.
+# Other column types get only their id, so check_column_types() stops a refresh
+# that would read one of those.
 COLUMN_FRAGMENT = """
 fragment Cols on ColumnValue {
   id
-  text
-  type
   ... on NumbersValue { number }
-  ... on StatusValue { index text }
-  ... on DropdownValue { text }   # <- removed 'ids'
-  ... on EmailValue { email text }
-  ... on PhoneValue { phone country_short_name text }
+  ... on StatusValue { text }
+  ... on DropdownValue { text }
+  ... on EmailValue { email }
+  ... on PhoneValue { phone }
   ... on TextValue { text }
-  ... on BoardRelationValue { linked_item_ids linked_items { id } }
+  ... on CheckboxValue { text }
+  ... on BoardRelationValue { linked_item_ids }
 }
 """
 
+# Column types whose block in COLUMN_FRAGMENT carries what each field type reads;
+# a column of any other type would come back with just its id and parse as empty
+FIELD_COLUMN_TYPES = {
+    "number": {"numbers"},
+    "text": {"status", "dropdown", "text", "checkbox"},
+    "email": {"email", "text"},
+    "phone": {"phone", "text"},
+    "relation": {"board_relation"},
+    "link": {"board_relation"},
+}
+
 def get_board_columns(board_id: int):
     """Fetch board columns metadata (id, title, type)."""
     q = """
@@ -85,23 +115,65 @@ def get_board_columns(board_id: int):
     """
     return gql(q, {"board_id":[board_id]})["boards"][0]["columns"]
 
-def items_page_query(board_id: int, limit=500, query_params=None, column_ids=None):
+_checked_columns = set()  # (board, selected column ids) already checked in this process
+
+def check_column_types(board_id: int, fields, column_ids=None):
+    """
+    Raise ValueError if a column the fields read (just `column_ids`, if given)
+    is missing from the board or of a type COLUMN_FRAGMENT doesn't fetch the
+    value for. One columns request per board and selection per process.
+    """
+    key = (board_id, None if column_ids is None else tuple(column_ids))
+    if key in _checked_columns:
+        return
+    types = {c["id"]: c["type"] for c in get_board_columns(board_id)}
+    problems = []
+    for name, kind, source in fields:
+        allowed = FIELD_COLUMN_TYPES.get(kind)
+        if allowed is None or (column_ids is not None and source not in column_ids):
+            continue
+        if source not in types:
+            problems.append(f"{name}: no column {source!r}")
+        elif types[source] not in allowed:
+            problems.append(f"{name}: column {source!r} is {types[source]!r}, "
+                            f"COLUMN_FRAGMENT reads {kind} fields from {'/'.join(sorted(allowed))}")
+    if problems:
+        raise ValueError(f"board {board_id}: " + "; ".join(problems))
+    _checked_columns.add(key)
+
+ITEM_FIELDS = ("name", "group")  # optional item-level fields; id and updated_at always come along
+
+def _item_selection(column_ids=None, item_fields=ITEM_FIELDS):
     """
-    Read a board page using items_page. Optionally filter with query_params and restrict to column_ids.
-    Returns (items, cursor)
+    (fragment, selection) for one item: column_ids=None selects every column,
+    [] none at all (and then the Cols fragment must not be sent either).
     """
-    cols_selector = f'column_values(ids: {json.dumps(column_ids)})' if column_ids else "column_values"
+    parts = ["id", "updated_at"]
+    if "name" in item_fields:
+        parts.append("name")
+    if "group" in item_fields:
+        parts.append("group { id title }")
+    if column_ids is None:
+        parts.append("column_values { ...Cols }")
+    elif column_ids:
+        parts.append(f"column_values(ids: {json.dumps(list(column_ids))}) {{ ...Cols }}")
+    uses_cols = column_ids is None or len(column_ids) > 0
+    return (COLUMN_FRAGMENT if uses_cols else ""), "\n".join(parts)
+
+def items_page_query(board_id: int, limit=500, query_params=None, column_ids=None, item_fields=ITEM_FIELDS):
+    """
+    Read a board page using items_page. Optionally filter with query_params and restrict to
+    column_ids / item_fields. Returns (items, cursor)
+    """
+    fragment, selection = _item_selection(column_ids, item_fields)
     q = f"""
-    {COLUMN_FRAGMENT}
+    {fragment}
     query($board_id:[ID!], $limit:Int!, $query_params: ItemsQuery) {{
       boards(ids:$board_id) {{
         items_page(limit:$limit, query_params:$query_params) {{
           cursor
           items {{
-            id
-            name
-            group {{ id title }}
-            {cols_selector} {{ ...Cols }}
+            {selection}
           }}
         }}
       }}
@@ -111,18 +183,15 @@ def items_page_query(board_id: int, limit=500, query_params=None, column_ids=Non
     page = data["boards"][0]["items_page"]
     return page["items"], page["cursor"]
 
-def next_items_page(cursor: str, limit=500, column_ids=None):
-    cols_selector = f'column_values(ids: {json.dumps(column_ids)})' if column_ids else "column_values"
+def next_items_page(cursor: str, limit=500, column_ids=None, item_fields=ITEM_FIELDS):
+    fragment, selection = _item_selection(column_ids, item_fields)
     q = f"""
-    {COLUMN_FRAGMENT}
+    {fragment}
     query($cursor:String!, $limit:Int!) {{
       next_items_page(cursor:$cursor, limit:$limit) {{
         cursor
         items {{
-          id
-          name
-          group {{ id title }}
-          {cols_selector} {{ ...Cols }}
+          {selection}
         }}
       }}
     }}
@@ -130,15 +199,220 @@ def next_items_page(cursor: str, limit=500, column_ids=None):
     data = gql(q, {"cursor": cursor, "limit": limit})
     return data["next_items_page"]["items"], data["next_items_page"]["cursor"]
 
-def fetch_all_items(board_id: int, column_ids=None, query_params=None, per_page=500):
-    """Fetch all items using items_page + next_items_page."""
-    items, cursor = items_page_query(board_id, limit=per_page, query_params=query_params, column_ids=column_ids)
-    all_items = items[:]
+def _item_page_chain(board_id: int, column_ids=None, query_params=None, per_page=500, item_fields=ITEM_FIELDS,
+                     cursor=None):
+    """Yield (items, next cursor) per page: items_page, or next_items_page from `cursor` if given."""
+    if cursor is None:
+        items, cursor = items_page_query(board_id, limit=per_page, query_params=query_params,
+                                         column_ids=column_ids, item_fields=item_fields)
+        metrics.count(pages=1)
+        yield items, cursor
     while cursor:
-        items, cursor = next_items_page(cursor, limit=per_page, column_ids=column_ids)
+        items, cursor = next_items_page(cursor, limit=per_page, column_ids=column_ids, item_fields=item_fields)
+        metrics.count(pages=1)
+        yield items, cursor
+
+def iter_item_pages(board_id: int, column_ids=None, query_params=None, per_page=500, item_fields=ITEM_FIELDS):
+    """Yield the board's items one page at a time (items_page, then next_items_page)."""
+    for items, _ in _item_page_chain(board_id, column_ids=column_ids, query_params=query_params,
+                                     per_page=per_page, item_fields=item_fields):
+        yield items
+
+def fetch_all_items(board_id: int, column_ids=None, query_params=None, per_page=500, item_fields=ITEM_FIELDS,
+                    checkpoint=False):
+    """
+    Fetch all items using items_page + next_items_page. With checkpoint=True
+    every page is saved as it arrives, and a fetch of the same selection that
+    was interrupted picks up where it stopped (see _fetch_checkpointed).
+    """
+    if checkpoint and CHECKPOINT_PAGES:
+        return _fetch_checkpointed(board_id, column_ids=column_ids, query_params=query_params,
+                                   per_page=per_page, item_fields=item_fields)
+    all_items = []
+    for items in iter_item_pages(board_id, column_ids=column_ids, query_params=query_params, per_page=per_page,
+                                 item_fields=item_fields):
         all_items.extend(items)
     return all_items
 
+def board_items_count(board_id: int) -> int:
+    """Number of items on the board (query_params filters are not applied)."""
+    q = "query($board_id:[ID!]) { boards(ids:$board_id) { items_count } }"
+    return gql(q, {"board_id": [board_id]})["boards"][0]["items_count"] or 0
+
+def fetch_item_ids(board_id: int, query_params=None, per_page=500):
+    """Ids of every item currently on the board (no column values, so pages are cheap)."""
+    q = """
+    query($board_id:[ID!], $limit:Int!, $query_params: ItemsQuery) {
+      boards(ids:$board_id) {
+        items_page(limit:$limit, query_params:$query_params) { cursor items { id } }
+      }
+    }
+    """
+    page = gql(q, {"board_id":[board_id], "limit":per_page, "query_params":query_params})["boards"][0]["items_page"]
+    metrics.count(pages=1)
+    ids = [it["id"] for it in page["items"]]
+    cursor = page["cursor"]
+    while cursor:
+        q_next = """
+        query($cursor:String!, $limit:Int!) {
+          next_items_page(cursor:$cursor, limit:$limit) { cursor items { id } }
+        }
+        """
+        page = gql(q_next, {"cursor": cursor, "limit": per_page})["next_items_page"]
+        metrics.count(pages=1)
+        ids.extend(it["id"] for it in page["items"])
+        cursor = page["cursor"]
+    return ids
+
+# --- Incremental sync -------------------------------------------------------
+# Raw items are kept in a local snapshot per (board, selection). A refresh asks
+# monday only for items updated since the last sync (creation counts as an
+# update). Deleted/archived items, and items that no longer match the board's
+# query_params, only show up in an id-only pass over the whole board (N/500
+# sequential pages), so that runs every DELETION_CHECK_EVERY syncs; webhook
+# delete events drop items in between.
+SYNC_CACHE_DIR = os.getenv("MONDAY_CACHE_DIR", ".monday_cache")
+SYNC_OVERLAP = timedelta(days=1)  # "last updated" filters compare by date
+FULL_SYNC = os.getenv("MONDAY_FULL_SYNC", "").lower() in ("1", "true", "yes")
+DELETION_CHECK_EVERY = max(1, int(os.getenv("MONDAY_DELETION_CHECK_EVERY", "12")))  # 1 = every sync
+
+item_store = ItemStore(SYNC_CACHE_DIR)
+
+# --- Page checkpoints -------------------------------------------------------
+# A long fetch saves every page with the cursor that follows it (checkpoints.py).
+# After a failure the next fetch of the same selection resumes from that cursor
+# while monday still honours it (cursors live 60 minutes); past that, the pages
+# already saved are kept and only the ids missing from them are read, by id.
+CHECKPOINT_PAGES = os.getenv("MONDAY_CHECKPOINT_PAGES", "1").lower() not in ("0", "false", "no")
+CURSOR_TTL_SECONDS = 55 * 60  # a little under monday's 60 minutes
+RESUME_BY_ID_MAX_SHARE = 0.5  # past this share of the board missing, by-id reads cost more than a fresh pull
+page_checkpoints = PageCheckpoints(SYNC_CACHE_DIR,
+                                   max_age=float(os.getenv("MONDAY_CHECKPOINT_MAX_AGE_HOURS", "6")) * 3600)
+
+def _checkpoint_key(board_id, column_ids=None, query_params=None, item_fields=ITEM_FIELDS):
+    return ItemStore.key_for(board_id, column_ids, query_params, item_fields=item_fields)
+
+def _cursor_expired(error: MondayAPIError) -> bool:
+    return any("cursor" in json.dumps(err).lower() for err in error.errors or [])
+
+def checkpoint_started_at(board_id, column_ids=None, query_params=None, item_fields=ITEM_FIELDS):
+    """When an unfinished, resumable fetch of this selection began (iso str), or None."""
+    return page_checkpoints.started_at(_checkpoint_key(board_id, column_ids, query_params, item_fields))
+
+def _fetch_checkpointed(board_id, column_ids=None, query_params=None, per_page=500, item_fields=ITEM_FIELDS):
+    key = _checkpoint_key(board_id, column_ids, query_params, item_fields)
+    state = page_checkpoints.load(key)
+    if state is None:
+        page_checkpoints.start(key, datetime.now(tz.tzutc()).isoformat())
+        items, cursor = [], None
+    else:
+        items, cursor = state["items"], state["cursor"]
+        metrics.count(pages_resumed=state["pages"])
+        if cursor is not None and time.time() - state["saved_at"] > CURSOR_TTL_SECONDS:
+            return _resume_by_id(board_id, key, items, column_ids, query_params, per_page, item_fields)
+
+    if state is None or cursor is not None:
+        pages = _item_page_chain(board_id, column_ids=column_ids, query_params=query_params, per_page=per_page,
+                                 item_fields=item_fields, cursor=cursor)
+        try:
+            for page, cursor in pages:
+                page_checkpoints.append(key, page, cursor)
+                items.extend(page)
+        except MondayAPIError as e:
+            if not _cursor_expired(e):
+                raise
+            return _resume_by_id(board_id, key, items, column_ids, query_params, per_page, item_fields)
+    page_checkpoints.finish(key)
+    return items
+
+def _resume_by_id(board_id, key, items, column_ids, query_params, per_page, item_fields):
+    """
+    Finish a fetch whose cursor is gone: list the board's ids (cheap id-only
+    pages) and read just the ones the saved pages don't have, 100 per request
+    and several requests at a time. Board order is kept, and saved items that
+    are no longer on the board are dropped. If most of the board is missing,
+    the checkpoint is dropped and the board paged through again instead.
+    """
+    by_id = {it["id"]: it for it in items}
+    # items_count ignores query_params, so a filtered board only looks more incomplete than it is
+    if len(by_id) < (1 - RESUME_BY_ID_MAX_SHARE) * board_items_count(board_id):
+        page_checkpoints.finish(key)
+        return _fetch_checkpointed(board_id, column_ids, query_params, per_page, item_fields)
+    live_ids = fetch_item_ids(board_id, query_params=query_params, per_page=per_page)
+    missing = [i for i in live_ids if i not in by_id]
+    # The ids were listed with the board's query_params, so items(ids:) needs no filter
+    by_id.update((it["id"], it) for it in fetch_items_by_id(missing, column_ids=column_ids, item_fields=item_fields))
+    page_checkpoints.finish(key)
+    return [by_id[i] for i in live_ids if i in by_id]
+
+def _updated_since_params(query_params, since: datetime):
+    """Add an `updated >= since` rule to the board's own query_params."""
+    rule = {
+        "column_id": "__last_updated__",
+        "compare_value": ["EXACT", since.strftime("%Y-%m-%d")],
+        "compare_attribute": "UPDATED_AT",
+        "operator": "greater_than_or_equals",
+    }
+    qp = dict(query_params or {})
+    qp["rules"] = list(qp.get("rules") or []) + [rule]
+    qp["operator"] = "and"
+    return qp
+
+def _store_key(board_id, column_ids=None, query_params=None, item_fields=ITEM_FIELDS):
+    """Item store key of a board synced with this selection (see sync_board)."""
+    return ItemStore.key_for(board_id, column_ids, query_params,
+                             item_fields=None if tuple(item_fields) == ITEM_FIELDS else item_fields)
+
+def sync_board(board_id: int, column_ids=None, query_params=None, per_page=500, full=None, item_fields=ITEM_FIELDS,
+               return_delta=False):
+    """
+    Return the board's items (same shape as fetch_all_items), pulling only
+    what changed since the previous sync and merging it into the snapshot.
+    With return_delta=True, returns (items, delta): delta is {"full": True}
+    after a full pull, else {"full": False, "base": the previous sync time,
+    "changed": ids, "removed": ids}; both carry this sync's "synced_at".
+    """
+    key = _store_key(board_id, column_ids, query_params, item_fields)
+    snap = None if (FULL_SYNC if full is None else full) else item_store.load(key)
+    started = datetime.now(tz.tzutc())
+
+    def fetch(qp):
+        # Pages resumed from a checkpoint are as old as that fetch: sync from when it began
+        nonlocal started
+        resumed = checkpoint_started_at(board_id, column_ids, qp, item_fields) if CHECKPOINT_PAGES else None
+        if resumed:
+            started = min(started, datetime.fromisoformat(resumed))
+        return fetch_all_items(board_id, column_ids=column_ids, query_params=qp, per_page=per_page,
+                               item_fields=item_fields, checkpoint=True)
+
+    unchecked = 0
+    if snap is None:
+        items = fetch(query_params)
+        by_id = {it["id"]: it for it in items}
+        delta = {"full": True}
+    else:
+        since = datetime.fromisoformat(snap["synced_at"]) - SYNC_OVERLAP
+        changed = fetch(_updated_since_params(query_params, since))
+        known = snap["items"]
+        before = set(known)
+        known.update({it["id"]: it for it in changed})
+        unchecked = snap.get("unchecked_syncs", 0) + 1
+        if unchecked >= DELETION_CHECK_EVERY:
+            # Keep board order; ids that vanished were deleted, archived or filtered out
+            live_ids = fetch_item_ids(board_id, query_params=query_params, per_page=per_page)
+            by_id = {i: known[i] for i in live_ids if i in known}
+            unchecked = 0
+        else:
+            by_id = known  # new items go last until the next id pass
+        delta = {"full": False, "base": snap["synced_at"],
+                 "changed": [it["id"] for it in changed if it["id"] in by_id],
+                 "removed": sorted(before - set(by_id))}
+
+    item_store.save(key, started.isoformat(), by_id, unchecked)
+    delta["synced_at"] = started.isoformat()
+    items = list(by_id.values())
+    return (items, delta) if return_delta else items
+
 # Boards
 BOARD_PLEDGES = 6704457477         # "Pledges"
 BOARD_GIFTS_2025 = 3907842599      # "2025 Gifts"
@@ -201,22 +475,143 @@ D_PHONE = "phone"
 D_ADDR = "text7"
 DONOR_COLS = [D_EMAIL, D_PHONE, D_ADDR]
 
+PAGE_LIMIT = 500  # fixed page size
+
 DATE_COL_OLDGIFTS = "date"
 
-# Build query_params for date > "2024-01-01"
-date_filter_params = {
-    "rules": [{
-        "column_id": DATE_COL_OLDGIFTS,
-        "compare_value": ["EXACT", "2024-01-01"],
-        "operator": "greater_than"
-    }]
+# Declarative filters per board: pushed into items_page query_params where monday
+# can evaluate them, applied to the raw items before parsing otherwise (filters.py).
+# REGION_REV_FILTERS (JSON, {board: [spec, ...]}) adds to these.
+_env_filters = filters.filters_from_env(os.getenv("REGION_REV_FILTERS", ""))
+BOARD_FILTERS = {
+    "pledges": _env_filters.pop("pledges", []),
+    "gifts_2025": _env_filters.pop("gifts_2025", []),
+    "gifts_old": [filters.DateRange(DATE_COL_OLDGIFTS, after="2024-01-01")] + _env_filters.pop("gifts_old", []),
 }
+if _env_filters:
+    raise ValueError(f"REGION_REV_FILTERS: unknown boards {sorted(_env_filters)}; expected {sorted(BOARD_FILTERS)}")
 
-pledges_raw = fetch_all_items(BOARD_PLEDGES, column_ids=PLEDGE_COLS)
-gifts2025_raw = fetch_all_items(BOARD_GIFTS_2025, column_ids=GIFTS25_COLS)
-gifts_old_raw = fetch_all_items(BOARD_GIFTS_2012_24, column_ids=GIFTSOLD_COLS, query_params=date_filter_params)
+def _fetch_board_items(board_id):
+    """Every item of a board with its name and the donor columns (checkpointed, see fetch_all_items)."""
+    return fetch_all_items(board_id, column_ids=DONOR_COLS, per_page=PAGE_LIMIT, item_fields=("name",),
+                           checkpoint=True)
+
+# Donor resolution: "ids" looks up only the candidate donors via items(ids:),
+# "board" pulls the whole Donors board alongside the other boards.
+DONOR_LOOKUP = os.getenv("MONDAY_DONOR_LOOKUP", "ids")
+ITEMS_BY_ID_LIMIT = 100  # items(ids:) returns at most 100 items per query
+
+def fetch_items_by_id(item_ids, column_ids=None, batch_size=ITEMS_BY_ID_LIMIT, item_fields=("name",)):
+    """Fetch specific items with items(ids: [...]), one batch per request, batches in parallel."""
+    fragment, selection = _item_selection(column_ids, item_fields)
+    q = f"""
+    {fragment}
+    query($ids:[ID!], $limit:Int!) {{
+      items(ids:$ids, limit:$limit) {{
+        {selection}
+      }}
+    }}
+    """
+    ids = [str(x) for x in item_ids]
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    if not batches:
+        return []
 
-len(pledges_raw), len(gifts2025_raw), len(gifts_old_raw)
+    def fetch_batch(batch):
+        items = gql(q, {"ids": batch, "limit": len(batch)})["items"] or []
+        metrics.count(pages=1)
+        return items
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="items-by-id") as pool:
+        futures = [metrics.submit(pool, fetch_batch, batch) for batch in batches]
+        return [it for fut in futures for it in fut.result()]
+
+def fetch_board_items_by_id(board_id, item_ids, column_ids=None, query_params=None, item_fields=ITEM_FIELDS):
+    """
+    Specific items of one board, through items_page so the board's query_params
+    still apply: ids that don't come back were deleted, archived or filtered out.
+    """
+    ids = [str(x) for x in item_ids]
+    items = []
+    for i in range(0, len(ids), ITEMS_BY_ID_LIMIT):
+        qp = dict(query_params or {}, ids=ids[i:i + ITEMS_BY_ID_LIMIT])
+        items += fetch_all_items(board_id, column_ids=column_ids, query_params=qp, item_fields=item_fields)
+    return items
+
+DONOR_CACHE_KEY = ItemStore.key_for(BOARD_DONORS, DONOR_COLS, {"lookup": "ids"})
+
+def fetch_donor_items_by_id(candidate_donor_ids, sync_changed=True):
+    """
+    Donor items for the given ids, served from the local donor cache where
+    possible. Cached donors that changed on the board since the last lookup
+    are refreshed first (unless sync_changed=False, e.g. when webhooks already
+    patched the cache); only ids never seen before are requested by id.
+    """
+    snap = None if FULL_SYNC else item_store.load(DONOR_CACHE_KEY)
+    started = datetime.now(tz.tzutc())
+
+    cached = {} if snap is None else snap["items"]
+    if snap is not None and not sync_changed:
+        started = datetime.fromisoformat(snap["synced_at"])  # nothing was re-synced, keep the mark
+    elif snap is not None:
+        since = datetime.fromisoformat(snap["synced_at"]) - SYNC_OVERLAP
+        changed = fetch_all_items(BOARD_DONORS, column_ids=DONOR_COLS,
+                                  query_params=_updated_since_params(None, since))
+        cached.update({it["id"]: it for it in changed if it["id"] in cached})
+
+    wanted = []
+    for x in candidate_donor_ids:
+        try:
+            wanted.append(str(int(x)))
+        except (TypeError, ValueError):
+            continue
+    missing = sorted(set(wanted) - set(cached))
+    cached.update({it["id"]: it for it in fetch_items_by_id(missing, column_ids=DONOR_COLS)})
+
+    item_store.save(DONOR_CACHE_KEY, started.isoformat(), cached)
+    return [cached[i] for i in dict.fromkeys(wanted) if i in cached]
+
+def fetch_boards_concurrently(jobs: dict):
+    """
+    Run independent board fetches in parallel. `jobs` maps a name to a
+    zero-arg callable (one cursor chain each); returns {name: items}.
+    Pages within a board stay sequential; all requests share one client.
+    Each board is timed as its own "fetch" stage.
+    """
+    def timed(name, fn):
+        with metrics.stage("fetch", board=name) as s:
+            out = fn()
+            s["rows"] = len(out)
+        return out
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="board") as pool:
+        futures = {name: metrics.submit(pool, timed, name, fn) for name, fn in jobs.items()}
+        return {name: fut.result() for name, fut in futures.items()}
+
+def fetch_raw_boards(outputs=None):
+    """
+    Fetch stage: raw item lists per board, keyed by board name. Only the
+    columns the outputs read are requested (default: PIPELINE_OUTPUTS).
+    """
+    outputs = PIPELINE_OUTPUTS if outputs is None else outputs
+    deltas = {}
+
+    def fetch(name, plan):
+        check_column_types(plan["board_id"], BOARDS[name][1], plan["column_ids"])
+        items, delta = sync_board(plan["board_id"], column_ids=plan["column_ids"], query_params=plan["query_params"],
+                                  item_fields=plan["item_fields"], return_delta=True)
+        kept, deltas[name] = keep_with_delta(items, delta, plan["keep"])
+        return kept
+
+    jobs = {name: lambda n=name: fetch(n, fetch_plan(n, outputs)) for name in BOARDS}
+    if needs_donors(outputs):
+        check_column_types(BOARD_DONORS, DONOR_FIELDS)
+    if DONOR_LOOKUP == "board" and needs_donors(outputs):
+        jobs["donors"] = lambda: sync_board(BOARD_DONORS, column_ids=DONOR_COLS)
+    # Otherwise donors are looked up by id in parse_boards, once the gifts are known
+    raw = fetch_boards_concurrently(jobs)
+    raw["deltas"] = deltas  # per board: what changed since the last sync (see sync_board)
+    return raw
 
 
 def cv_map(item):
@@ -250,198 +645,530 @@ def get_connect_single_id(cv):
     return int(ids[0]) if ids else None
 
 def get_email(cv):
-    return (cv or {}).get("email") or (cv or {}).get("text")
+    # The fragment no longer sends the duplicate text; an empty column still reads as ""
+    return None if cv is None else (cv.get("email") or cv.get("text") or "")
 
 def get_phone(cv):
-    return (cv or {}).get("phone") or (cv or {}).get("text")
-
-def get_checkbox(cv):
-    return (cv or {}).get("checked") or (cv or {}).get("text")
-
-
-def pledges_to_df(items):
-    rows = []
-    for it in items:
-        cv = cv_map(it)
-        rows.append({
-            "pledge_id": int(it["id"]),
-            "name": it["name"],
-            "group_title": (it.get("group") or {}).get("title"),
-            "commitment_type": get_status_text(cv.get(P_COMMITMENT_TYPE)),
-            "total_commitment": get_number(cv.get(P_TOTAL_COMMITMENT), 0.0),
-            "region": get_dropdown_text(cv.get(P_REGION)),
-            "linked_gift_ids": get_board_relation_ids(cv.get(P_LINKED_GIFTS)),
-            "email": get_email(cv.get(P_EMAIL)),
-            "phone": get_phone(cv.get(P_PHONE)),
-            "second_phone": get_phone(cv.get(P_SECOND_PHONE)),
-            "addr_lines": get_text(cv.get(P_ADDR)),
-            "city": get_text(cv.get(P_CITY)),
-            "state": get_dropdown_text(cv.get(P_STATE)),
-            "zip": get_text(cv.get(P_ZIP)),
-        })
-    return pd.DataFrame(rows)
-
-def gifts_to_df(items, is_2025=True):
-    rows = []
-    for it in items:
-        cv = cv_map(it)
-        linked_donor = get_connect_single_id(cv.get(G25_LINKED_DONOR if is_2025 else GOLD_LINKED_DONOR))
-        linked_soft = get_connect_single_id(cv.get(G25_LINKED_SOFT_CREDIT if is_2025 else GOLD_LINKED_SOFT_CREDIT))
-        amount = get_number(cv.get(G25_AMOUNT if is_2025 else GOLD_AMOUNT), 0.0)
-        gl = get_dropdown_text(cv.get(G25_GL if is_2025 else GOLD_GL))
-        cls = get_dropdown_text(cv.get(G25_CLASS if is_2025 else GOLD_CLASS))
-        pref = get_dropdown_text(cv.get(G25_PREF if is_2025 else GOLD_PREF))
-        solic = get_dropdown_text(cv.get(G25_SOLIC if is_2025 else GOLD_SOLIC))
-        check = get_checkbox(cv.get(G25_CHECK if is_2025 else GOLD_CHECK))
-        mapped_class = get_dropdown_text(cv.get(G25_MAPPED_CLASS if is_2025 else GOLD_MAPPED_CLASS))
-        rows.append({
-            "gift_id": int(it["id"]),
-            "name": it["name"],
-            "group_title": (it.get("group") or {}).get("title"),  # "2024"/"2025"/etc.
-            "linked_donor_id": linked_donor,
-            "linked_soft_credit_id": linked_soft,
-            "amount": amount,
-            "gl_account": gl,
-            "class": cls,
-            "gift_preference": pref,
-            "solicitation": solic,
-            "checkbox": check,
-            "mapped_class": mapped_class,
-            "board": "2025 Gifts" if is_2025 else "2012-24 Gifts",
-        })
-    return pd.DataFrame(rows)
-
-pledges_df = pledges_to_df(pledges_raw)
-gifts25_df = gifts_to_df(gifts2025_raw, is_2025=True)
-gifts_old_df = gifts_to_df(gifts_old_raw, is_2025=False)
+    return None if cv is None else (cv.get("phone") or cv.get("text") or "")
+
+
+# Output columns per board: (name, field type, source). Source is the monday
+# column id the value comes from, or the item field ("id", "name", "group"); it
+# is what lets a refresh select only what the requested reports read. The type
+# says how the value is read; read_fields() does that for a whole page at once,
+# field_getter() for a single item (local filters) with the getters above:
+#   id, name, group   the item's id (int), name, group title
+#   number            the column's number (0.0 when empty)
+#   text              its text (status/dropdown labels, comma-joined; checkbox "v"/"")
+#   email, phone      the address/number, else the text, else "" (None if the column is missing)
+#   relation          linked item ids (list of ints); link: the first one or None
+PLEDGE_FIELDS = [
+    ("pledge_id", "id", "id"),
+    ("name", "name", "name"),
+    ("group_title", "group", "group"),
+    ("commitment_type", "text", P_COMMITMENT_TYPE),
+    ("total_commitment", "number", P_TOTAL_COMMITMENT),
+    ("region", "text", P_REGION),
+    ("linked_gift_ids", "relation", P_LINKED_GIFTS),
+    ("email", "email", P_EMAIL),
+    ("phone", "phone", P_PHONE),
+    ("second_phone", "phone", P_SECOND_PHONE),
+    ("addr_lines", "text", P_ADDR),
+    ("city", "text", P_CITY),
+    ("state", "text", P_STATE),
+    ("zip", "text", P_ZIP),
+]
 
+def gift_fields(is_2025=True):
+    """Gift columns for either gifts board; only the column ids differ."""
+    donor, soft, amount, gl, cls, pref, solic, check, mapped = (
+        (G25_LINKED_DONOR, G25_LINKED_SOFT_CREDIT, G25_AMOUNT, G25_GL, G25_CLASS, G25_PREF, G25_SOLIC, G25_CHECK, G25_MAPPED_CLASS)
+        if is_2025 else
+        (GOLD_LINKED_DONOR, GOLD_LINKED_SOFT_CREDIT, GOLD_AMOUNT, GOLD_GL, GOLD_CLASS, GOLD_PREF, GOLD_SOLIC, GOLD_CHECK, GOLD_MAPPED_CLASS)
+    )
+    return [
+        ("gift_id", "id", "id"),
+        ("name", "name", "name"),
+        ("group_title", "group", "group"),  # "2024"/"2025"/etc.
+        ("linked_donor_id", "link", donor),
+        ("linked_soft_credit_id", "link", soft),
+        ("amount", "number", amount),
+        ("gl_account", "text", gl),
+        ("class", "text", cls),
+        ("gift_preference", "text", pref),
+        ("solicitation", "text", solic),
+        ("checkbox", "text", check),
+        ("mapped_class", "text", mapped),
+    ]
+
+DONOR_FIELDS = [
+    ("donor_id", "id", "id"),
+    ("donor_name", "name", "name"),
+    ("email", "email", D_EMAIL),
+    ("phone", "phone", D_PHONE),
+    ("addr_lines", "text", D_ADDR),
+]
+DONOR_MAP_FIELDS = [name for name, kind, _ in DONOR_FIELDS if kind != "id"]  # donor_map values
+
+FIELD_GETTERS = {
+    "number": lambda cv: get_number(cv, 0.0),
+    "text": get_text,
+    "email": get_email,
+    "phone": get_phone,
+    "relation": get_board_relation_ids,
+    "link": get_connect_single_id,
+}
 
-PAGE_LIMIT = 500  # fixed page size
+def field_getter(field):
+    """getter(item, cv) for one field: what ColumnBuffers computes, for a single raw item."""
+    _, kind, source = field
+    if kind == "id":
+        return lambda it, cv: int(it["id"])
+    if kind == "name":
+        return lambda it, cv: it["name"]
+    if kind == "group":
+        return lambda it, cv: (it.get("group") or {}).get("title")
+    get = FIELD_GETTERS[kind]
+    return lambda it, cv: get(cv.get(source))
+
+# Compact frame schema: categoricals for low-cardinality labels, nullable Int64
+# ids, Arrow-backed strings for free text. Gift links are an Arrow list<int64>
+# column, i.e. one offsets buffer + one flat id buffer rather than a Python list
+# per row.
+LABEL = "category"
+TEXT = pd.StringDtype("pyarrow")
+ID_LIST = pd.ArrowDtype(pa.list_(pa.int64()))
+
+PLEDGE_SCHEMA = {
+    "pledge_id": "Int64", "name": TEXT, "group_title": LABEL, "commitment_type": LABEL,
+    "total_commitment": "float64", "region": LABEL, "linked_gift_ids": ID_LIST,
+    "email": TEXT, "phone": TEXT, "second_phone": TEXT, "addr_lines": TEXT,
+    "city": TEXT, "state": LABEL, "zip": TEXT,
+}
+GIFT_SCHEMA = {
+    "gift_id": "Int64", "name": TEXT, "group_title": LABEL,
+    "linked_donor_id": "Int64", "linked_soft_credit_id": "Int64", "amount": "float64",
+    "gl_account": LABEL, "class": LABEL, "gift_preference": LABEL, "solicitation": LABEL,
+    "checkbox": LABEL, "mapped_class": LABEL, "board": LABEL,
+}
 
-def _fetch_board_items(board_id):
-    q = f"""
-    {COLUMN_FRAGMENT}
-    query($board_id:[ID!], $cursor:String, $limit:Int!) {{
-      boards(ids:$board_id) {{
-        items_page(cursor:$cursor, limit:$limit) {{
-          cursor
-          items {{
-            id
-            name
-            column_values(ids: {json.dumps(DONOR_COLS)}) {{ ...Cols }}
-          }}
-        }}
-      }}
-    }}
+def _item_field(items, key, sub=None):
+    """it[key] (or it[key][sub]) of every item in one C-level pass; None where missing."""
+    try:
+        values = list(map(itemgetter(key), items))
+        return values if sub is None else list(map(itemgetter(sub), values))
+    except (KeyError, TypeError):
+        values = [it.get(key) for it in items]
+        return values if sub is None else [(v or {}).get(sub) for v in values]
+
+class _PageColumns:
+    """
+    A page's column values lined up by column id. monday sends every item's
+    column values in the same order, so a column is normally just a stride
+    through the flattened page, read with one C-level map per field. If the ids
+    don't line up (an item missing a column, say), each value is placed by
+    (item, column id) instead, the last one winning like cv_map().
+    """
+
+    def __init__(self, items, column_ids):
+        self.n = len(items)
+        self.missing = {}  # stands in for a column an item doesn't have
+        per_item = _item_field(items, "column_values")
+        try:
+            flat = list(chain.from_iterable(per_item))
+        except TypeError:  # an item without column values
+            per_item = [cvs or () for cvs in per_item]
+            flat = list(chain.from_iterable(per_item))
+        ids = list(map(itemgetter("id"), flat))
+        self.width = len(per_item[0]) if per_item else 0
+        self.flat, self.layout = flat, None
+        if self.width and len(flat) == self.n * self.width and \
+                all(ids[j::self.width].count(ids[j]) == self.n for j in range(self.width)):
+            self.layout = {cid: j for j, cid in enumerate(ids[:self.width])}  # a repeated id: its last position
+            return
+
+        codes = np.fromiter(map({cid: j for j, cid in enumerate(column_ids)}.get, ids, repeat(-1)),
+                            dtype=np.int64, count=len(ids))
+        item_of = np.repeat(np.arange(self.n), np.fromiter(map(len, per_item), dtype=np.int64, count=self.n))
+        pos = np.full((len(column_ids), self.n), -1, dtype=np.int64)
+        hit = codes >= 0
+        np.maximum.at(pos, (codes[hit], item_of[hit]), np.flatnonzero(hit))
+        flat.append(self.missing)  # position -1
+        self.cvs = {cid: [flat[p] for p in pos[j].tolist()] for j, cid in enumerate(column_ids)}
+
+    def column(self, cid):
+        """The column value dict of each item (self.missing where there is none)."""
+        if self.layout is None:
+            return self.cvs[cid]
+        j = self.layout.get(cid)
+        return [self.missing] * self.n if j is None else self.flat[j::self.width]
+
+    def values(self, cid, key):
+        """One field of the column's value on each item (None where absent)."""
+        cvs = self.column(cid)
+        try:
+            return list(map(itemgetter(key), cvs))
+        except KeyError:
+            return list(map(dict.get, cvs, repeat(key)))
+
+    def present(self, cid):
+        if self.layout is not None:
+            return np.full(self.n, cid in self.layout)
+        return np.fromiter((cv is not self.missing for cv in self.cvs[cid]), dtype=bool, count=self.n)
+
+def _strings(values):
+    return pa.array(values, type=pa.string())
+
+def _numbers(values):
+    try:
+        out = np.array(values, dtype=np.float64)
+        out[np.isnan(out)] = 0.0  # None
+        return out
+    except (TypeError, ValueError):  # empty (None) or unparseable numbers read as 0.0, like get_number()
+        return np.array([get_number({"number": v}, 0.0) for v in values], dtype=np.float64)
+
+def _contact(values, texts, present):
+    """The get_email/get_phone rule on a column: value, else text, else "" (None where the column is missing)."""
+    out = [v or t or "" for v, t in zip(values, texts)]
+    return out if present.all() else [x if p else None for x, p in zip(out, present.tolist())]
+
+def _id_lists(lists):
+    """(counts, flat int64 ids) of a column of linked_item_ids lists (None = no links)."""
+    lists = [ids or () for ids in lists]
+    counts = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    return counts, np.array(list(chain.from_iterable(lists)), dtype=np.int64)
+
+def _labels(strings):
+    """
+    A categorical with the sorted categories astype("category") gives, from the
+    Arrow dictionary encoding (so no Python string per row).
+    """
+    encoded = strings.combine_chunks().dictionary_encode()
+    categories = np.array(encoded.dictionary.to_pylist(), dtype=object)
+    order = np.argsort(categories)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    codes = np.append(rank, -1)[pc.fill_null(encoded.indices, -1).to_numpy()]  # null → -1
+    return pd.Categorical.from_codes(codes, categories=categories[order])
+
+def read_fields(items, fields, column_ids=None):
+    """
+    {name: values} for a page of raw items, a whole column per field: a list of
+    str/None for text-like types, an ndarray for id and number, (counts, flat
+    ids) for relation and link.
+    """
+    if column_ids is None:
+        column_ids = selection_for(fields)[0]
+    columns = _PageColumns(items, column_ids) if column_ids else None
+    out = {}
+    for name, kind, src in fields:
+        if kind == "id":
+            out[name] = np.array(_item_field(items, "id"), dtype=np.int64)
+        elif kind == "name":
+            out[name] = _item_field(items, "name")
+        elif kind == "group":
+            out[name] = _item_field(items, "group", "title")
+        elif kind == "number":
+            out[name] = _numbers(columns.values(src, "number"))
+        elif kind == "text":
+            out[name] = columns.values(src, "text")
+        elif kind in ("email", "phone"):
+            out[name] = _contact(columns.values(src, kind), columns.values(src, "text"), columns.present(src))
+        elif kind in ("relation", "link"):
+            out[name] = _id_lists(columns.values(src, "linked_item_ids"))
+        else:
+            raise ValueError(f"Unknown field type {kind!r} for {name!r}")
+    return out
+
+class ColumnBuffers:
+    """
+    Column buffers for one board, filled a page at a time. append_page() calls
+    read_fields(), which lines up a whole page's column values by column id
+    (_PageColumns) and reads each field's column in one go: C-level map/slice over the page's values,
+    then Arrow/numpy for typing, so there is no per-item dict or getter call.
+    The raw page can be dropped right away; the buffers keep compact per-page
+    chunks (Arrow strings, numpy numbers, id lists as counts + flat ids).
     """
-    items = []
-    cursor = None
-    while True:
-        variables = {"board_id": [board_id], "cursor": cursor, "limit": PAGE_LIMIT}
-        res = session.post(API_URL, json={"query": q, "variables": variables}, headers=None)
-        data = res.json()
-        boards = (data.get("data") or {}).get("boards") or []
-        page = boards[0]["items_page"] if boards else {"items": [], "cursor": None}
-        items.extend(page.get("items") or [])
-        cursor = page.get("cursor")
-        if not cursor:
-            break
-    return items
 
-def fetch_donors_map(candidate_donor_ids):
-    # Pull all items from the donors board
-    all_items = _fetch_board_items(BOARD_DONORS)
+    def __init__(self, fields, schema, constants=None):
+        self.fields = fields
+        self.schema = schema
+        self.constants = constants or {}  # columns with one value for the whole board
+        self.column_ids = selection_for(fields)[0]
+        self.chunks = {name: [] for name, _, _ in fields}
+        self.rows = 0
+
+    def append_page(self, items):
+        if not items:
+            return
+        for name, values in read_fields(items, self.fields, self.column_ids).items():
+            self.chunks[name].append(_strings(values) if isinstance(values, list) else values)
+        self.rows += len(items)
+
+    def to_df(self):
+        data = {}
+        for name, kind, _ in self.fields:
+            chunks = self.chunks[name]
+            if kind in ("relation", "link"):
+                counts = np.concatenate([c for c, _ in chunks]) if chunks else np.empty(0, dtype=np.int64)
+                ids = np.concatenate([v for _, v in chunks]) if chunks else np.empty(0, dtype=np.int64)
+                offsets = np.concatenate([[0], np.cumsum(counts)])
+                if kind == "relation":
+                    data[name] = pd.arrays.ArrowExtensionArray(pa.ListArray.from_arrays(offsets, ids))
+                else:
+                    first, linked = np.zeros(len(counts), dtype=np.int64), counts > 0
+                    first[linked] = ids[offsets[:-1][linked]]
+                    data[name] = pd.arrays.IntegerArray(first, ~linked)
+            elif kind in ("id", "number"):
+                data[name] = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64 if kind == "id" else np.float64)
+            else:
+                strings = pa.chunked_array(chunks, type=pa.string())
+                if self.schema.get(name) is TEXT:
+                    data[name] = pd.array(strings, dtype=TEXT)
+                elif self.schema.get(name) == LABEL:
+                    data[name] = _labels(strings)
+                else:
+                    data[name] = pd.Series(strings.to_numpy(zero_copy_only=False), dtype=object)
+        df = pd.DataFrame(data, columns=[name for name, _, _ in self.fields])
+        for name, value in self.constants.items():
+            df[name] = value
+        return df.astype({c: t for c, t in self.schema.items() if c in df.columns})
+
+# --- Report-driven projection -------------------------------------------------
+# Frame columns each output reads. A refresh decodes, and asks monday for, only
+# the union over the outputs it builds, so the regional table never pulls the
+# contact or metadata columns. The id column always comes along.
+REPORT_FIELDS = {
+    "region_rev_breakdown": {
+        "pledges": ["region", "linked_gift_ids"],
+        "gifts": ["amount", "group_title", "mapped_class"],
+    },
+    "region_balances": {
+        "pledges": ["group_title", "commitment_type", "total_commitment", "region", "linked_gift_ids"],
+        "gifts": ["amount", "group_title"],
+    },
+    "donor_map": {"gifts": ["linked_donor_id", "linked_soft_credit_id"]},  # + the donor lookup itself
+    "donor_clusters": {  # dedup.py over donors and pledge contacts; + the donor lookup
+        "pledges": ["name", "email", "phone", "second_phone", "addr_lines", "zip"],
+        "gifts": ["linked_donor_id", "linked_soft_credit_id"],
+    },
+    "details": {  # every parsed column (names, contacts, GL/class/preference/...)
+        "pledges": [name for name, _, _ in PLEDGE_FIELDS],
+        "gifts": [name for name, _, _ in gift_fields()],
+    },
+}
+TABLE_REPORTS = ("region_rev_breakdown", "region_balances")
+# Built on every refresh on top of the table, e.g. "donor_map,details" for the full pull
+EXTRA_OUTPUTS = tuple(x.strip() for x in os.getenv("REGION_REV_EXTRA_OUTPUTS", "").split(",") if x.strip())
+PIPELINE_OUTPUTS = TABLE_REPORTS + EXTRA_OUTPUTS
+
+def needs_donors(outputs):
+    """Whether the outputs need the donor lookup (the donor map itself, or clusters built on it)."""
+    return "donor_map" in outputs or "donor_clusters" in outputs
+
+def fields_for(outputs):
+    """{"pledges": names, "gifts": names}: the frame columns the given outputs read."""
+    unknown = set(outputs) - set(REPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}; expected some of {sorted(REPORT_FIELDS)}")
+    need = {"pledges": {"pledge_id"}, "gifts": {"gift_id"}}
+    for out in outputs:
+        for frame, names in REPORT_FIELDS[out].items():
+            need[frame].update(names)
+    return need
+
+def project(fields, wanted=None):
+    """The subset of a board's fields named in `wanted` (None = all of them)."""
+    return list(fields) if wanted is None else [f for f in fields if f[0] in wanted]
+
+def selection_for(fields):
+    """(column_ids, item_fields) monday has to return to fill these fields."""
+    sources = list(dict.fromkeys(src for _, _, src in fields))
+    column_ids = [src for src in sources if src not in ("id",) + ITEM_FIELDS]
+    item_fields = tuple(f for f in ITEM_FIELDS if f in sources)
+    return column_ids, item_fields
+
+# Parsed boards: name → (board id, fields)
+BOARDS = {
+    "pledges": (BOARD_PLEDGES, PLEDGE_FIELDS),
+    "gifts_2025": (BOARD_GIFTS_2025, gift_fields(True)),
+    "gifts_old": (BOARD_GIFTS_2012_24, gift_fields(False)),
+}
 
-    # Build lookup by integer ID
+def fetch_plan(name, outputs):
+    """
+    How to fetch one board for these outputs: its filters compiled into
+    query_params (+ a local keep() for what monday can't filter), and the
+    columns / item fields to select (what the outputs and keep() read).
+    """
+    board_id, fields = BOARDS[name]
+    wanted = fields_for(outputs)["pledges" if name == "pledges" else "gifts"]
+    query_params, keep, local_fields = filters.compile_filters(BOARD_FILTERS.get(name), fields, field_getter)
+    column_ids, item_fields = selection_for(project(fields, wanted | set(local_fields)))
+    return {"board_id": board_id, "query_params": query_params, "keep": keep,
+            "column_ids": column_ids, "item_fields": item_fields, "wanted": wanted}
+
+def keep_items(items, keep):
+    """Apply a plan's local filter (no-op when everything was pushed to monday)."""
+    return items if keep is None else [it for it in items if keep(it)]
+
+def keep_with_delta(items, delta, keep):
+    """keep_items(), with a sync delta adjusted to match: (kept items, delta)."""
+    kept = keep_items(items, keep)
+    if not delta["full"] and keep is not None:
+        # Changed items the local filter now rejects are gone as far as the reports go
+        kept_ids = {it["id"] for it in kept}
+        delta["removed"] += [i for i in delta["changed"] if i not in kept_ids]
+        delta["changed"] = [i for i in delta["changed"] if i in kept_ids]
+    return kept, delta
+
+def pledge_buffers(wanted=None):
+    return ColumnBuffers(project(PLEDGE_FIELDS, wanted), PLEDGE_SCHEMA)
+
+def gift_buffers(is_2025=True, wanted=None):
+    return ColumnBuffers(project(gift_fields(is_2025), wanted), GIFT_SCHEMA,
+                         {"board": "2025 Gifts" if is_2025 else "2012-24 Gifts"})
+
+def concat_frames(frames):
+    """pd.concat that keeps categorical columns categorical (unioning their categories)."""
+    frames = [f for f in frames if len(f.columns)]
+    for col in frames[0].columns if frames else []:
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames if col in f.columns):
+            cats = pd.api.types.union_categoricals([f[col] for f in frames if col in f.columns]).categories
+            frames = [f.assign(**{col: f[col].cat.set_categories(cats)}) if col in f.columns else f for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def parse_items(buffers, items):
+    """Decode a list of raw items a page at a time (an odd item only takes its own page off the fast path)."""
+    for start in range(0, len(items), PAGE_LIMIT):
+        buffers.append_page(items[start:start + PAGE_LIMIT])
+    return buffers.to_df()
+
+def pledges_to_df(items, wanted=None):
+    return parse_items(pledge_buffers(wanted), items)
+
+def gifts_to_df(items, is_2025=True, wanted=None):
+    return parse_items(gift_buffers(is_2025, wanted), items)
+
+def stream_board(board_id: int, buffers: ColumnBuffers, query_params=None, per_page=500,
+                 column_ids=None, item_fields=None, keep=None):
+    """
+    Fetch a board page by page straight into column buffers; returns the
+    DataFrame. By default only the columns and item fields the buffers decode
+    are requested; `keep` drops items locally before they are decoded.
+    """
+    if column_ids is None:
+        column_ids, item_fields = selection_for(buffers.fields)
+    for items in iter_item_pages(board_id, column_ids=column_ids, query_params=query_params, per_page=per_page,
+                                 item_fields=item_fields):
+        buffers.append_page(keep_items(items, keep))
+        del items  # only one raw page is held per board at a time
+    return buffers.to_df()
+
+
+def fetch_donors_map(candidate_donor_ids, all_items=None, sync_changed=True):
+    # Look up just the candidates (or pull the whole donors board), unless the caller already has the items
+    if all_items is None:
+        if DONOR_LOOKUP == "ids":
+            all_items = fetch_donor_items_by_id(candidate_donor_ids, sync_changed=sync_changed)
+        else:
+            all_items = _fetch_board_items(BOARD_DONORS)
+
+    # Read the donor items with the same column spec as the other boards (last item per id wins)
     by_id = {}
-    for it in all_items:
-        try:
-            by_id[int(it["id"])] = it
-        except Exception:
-            pass
+    for start in range(0, len(all_items), PAGE_LIMIT):
+        donors = read_fields(all_items[start:start + PAGE_LIMIT], DONOR_FIELDS)
+        by_id.update(zip(donors["donor_id"].tolist(), zip(*(donors[name] for name in DONOR_MAP_FIELDS))))
 
     # Build output for candidates that exist on the board
-    out = {}
-    seen = set()
+    wanted = []
     for x in candidate_donor_ids:
-        if x is None:
-            continue
         try:
-            xid = int(x)
-        except Exception:
-            continue
-        if xid in seen:
-            continue
-        seen.add(xid)
-        it = by_id.get(xid)
-        if not it:
+            wanted.append(int(x))
+        except (TypeError, ValueError):
             continue
-        cv = {c["id"]: c for c in it.get("column_values", [])}
-        out[str(it["id"])] = {
-            "donor_name": it.get("name"),
-            "email": get_email(cv.get(D_EMAIL)),
-            "phone": get_phone(cv.get(D_PHONE)),
-            "addr_lines": get_text(cv.get(D_ADDR)),
-        }
-    return out
+    return {str(xid): dict(zip(DONOR_MAP_FIELDS, by_id[xid])) for xid in dict.fromkeys(wanted) if xid in by_id}
+
+def candidate_donor_ids_from(*gift_dfs):
+    """Donor id set (soft-credit preferred; if soft is missing, use donor)."""
+    candidate_donor_ids = set()
+    for df in gift_dfs:
+        if df.empty or "linked_soft_credit_id" not in df.columns:
+            continue  # donor links weren't fetched (see REPORT_FIELDS)
+        ids = df["linked_soft_credit_id"].fillna(df["linked_donor_id"]).dropna()
+        candidate_donor_ids.update(int(x) for x in ids.unique())
+    return candidate_donor_ids
 
-# Build donor id set (soft-credit preferred; if soft is missing, use donor)
-candidate_donor_ids = set()
-for df in (gifts25_df, gifts_old_df):
-    for _, r in df.iterrows():
-        sc = r.get("linked_soft_credit_id")
-        dn = r.get("linked_donor_id")
-        if pd.notna(sc):
-            candidate_donor_ids.add(int(sc))
-        elif pd.notna(dn):
-            candidate_donor_ids.add(int(dn))
-
-donor_map = fetch_donors_map(candidate_donor_ids)
-
-print("Candidate donor IDs collected:", len(candidate_donor_ids))
-print("Valid donor IDs fetched   :", len(donor_map))
-print("Sample donors:")
-for k, v in list(donor_map.items())[:5]:
-    print(k, "→", v)
-
-
-all_gifts_df = pd.concat([gifts25_df, gifts_old_df], ignore_index=True)
-gift_amount_by_id = dict(zip(all_gifts_df["gift_id"], all_gifts_df["amount"]))
-gift_gl_by_id = dict(zip(all_gifts_df["gift_id"], all_gifts_df["gl_account"]))
-gift_group_by_id = dict(zip(all_gifts_df["gift_id"], all_gifts_df["group_title"]))
-gift_mapped_class_by_id = dict(zip(all_gifts_df["gift_id"], all_gifts_df["mapped_class"]))
-
-def summarize_region_gifts(pledges_df):
-    rows = []
-    for _, p in pledges_df.iterrows():
-        region = p["region"]
-        g_ids = p.get("linked_gift_ids") or []
-        for gid in g_ids:
-            amt = float(gift_amount_by_id.get(gid, 0.0))
-            grp = (gift_group_by_id.get(gid) or "").strip()
-            a24 = amt if grp == "2024 Gifts" else 0.0
-            a25 = amt if grp == "2025 Gifts" else 0.0
-            mapped_class = (gift_mapped_class_by_id.get(gid) or "").strip()
-
-            rows.append({
-                "region": region,
-                "mapped_class": mapped_class,
-                "amount": amt,
-                "additions_2024": a24,
-                "additions_2025": a25,
-            })
 
+def _pledge_gift_links(pledges_df):
+    """
+    Flatten the pledge → gift links into two aligned arrays: the row position
+    of the pledge in `pledges_df`, and the linked gift id (pledge order, then
+    link order — the order the row-by-row loops used to visit them).
+    Reads the Arrow list column's offsets/values directly; plain Python lists
+    are accepted too.
+    """
+    links = pledges_df["linked_gift_ids"]
+    if isinstance(links.dtype, pd.ArrowDtype):
+        arr = links.array.__arrow_array__().combine_chunks()
+        counts = pc.list_value_length(arr).fill_null(0).to_numpy(zero_copy_only=False)
+        gift_ids = arr.flatten().to_numpy(zero_copy_only=False).astype(np.int64, copy=False)
+    else:
+        lists = [g or [] for g in links]
+        counts = np.fromiter((len(g) for g in lists), dtype=np.int64, count=len(lists))
+        gift_ids = np.fromiter(chain.from_iterable(lists), dtype=np.int64, count=int(counts.sum()))
+    rows = np.repeat(np.arange(len(links)), counts)
+    return rows, gift_ids
+
+def _clean_labels(series):
+    """Stripped string labels with None → "" (the `(x or "").strip()` of the old loops)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Clean each category once, then fan out by code (-1 = missing → trailing "")
+        cats = pd.Series(series.cat.categories, dtype=object).astype(str).str.strip().to_numpy(dtype=object)
+        return np.append(cats, "")[series.cat.codes.to_numpy()]
+    return series.astype(object).fillna("").astype(str).str.strip().to_numpy(dtype=object)
+
+def _gift_lookup(all_gifts_df, gift_ids):
+    """
+    Look up amount / group / mapped_class for each linked gift id in one
+    indexed pass. Unknown gifts get amount 0 and empty labels; if a gift id
+    appears twice, the last row wins (as the old id → value dicts did).
+    """
+    gifts = all_gifts_df.drop_duplicates("gift_id", keep="last")
+    # get_indexer gives -1 for unknown ids, which picks the appended fallback slot
+    pos = pd.Index(gifts["gift_id"].astype("int64")).get_indexer(gift_ids)
+    amount = np.append(gifts["amount"].to_numpy(dtype="float64"), 0.0)[pos]
+    group = np.append(_clean_labels(gifts["group_title"]), "")[pos]
+    mapped_class = np.append(_clean_labels(gifts["mapped_class"]), "")[pos]
+    return amount, group, mapped_class
+
+def summarize_region_gifts(pledges_df, all_gifts_df):
     cols = ["region", "mapped_class", "amount", "additions_2024", "additions_2025"]
-    detail = pd.DataFrame(rows)
-    if detail.empty:
+    rows, gift_ids = _pledge_gift_links(pledges_df)
+    if len(gift_ids) == 0:
         return pd.DataFrame(columns=cols)
 
+    # One row per pledge→gift link, joined against the gift table
+    amount, group, mapped_class = _gift_lookup(all_gifts_df, gift_ids)
+    detail = pd.DataFrame({
+        "region": pledges_df["region"].to_numpy(dtype=object)[rows],
+        "mapped_class": mapped_class,
+        "amount": amount,
+        "additions_2024": np.where(group == "2024 Gifts", amount, 0.0),
+        "additions_2025": np.where(group == "2025 Gifts", amount, 0.0),
+    })
+
     # 1) Base grain: one row per (region, mapped_class)
     by_region_class = (
         detail
         .groupby(["region", "mapped_class"], dropna=False, as_index=False)[["amount","additions_2024","additions_2025"]]
         .sum()
     )
+    return _breakdown_rollups(by_region_class)
+
+def _breakdown_rollups(by_region_class):
+    """Region / class / grand totals around the (region, mapped_class) grain, in report order."""
+    cols = ["region", "mapped_class", "amount", "additions_2024", "additions_2025"]
 
     # 2) Per-region total (mapped_class="Total")
     per_region_total = (
@@ -491,68 +1218,697 @@ def summarize_region_gifts(pledges_df):
 
     return final_df
 
+# Share of every pledge balance reported as restricted; the rest is unrestricted
+RESTRICTED_SHARE = 0.70
+UNRESTRICTED_SHARE = 0.30
+
+def balances_by_region(pledges_df, all_gifts_df):
+    if pledges_df.empty:
+        return pd.DataFrame()
+    return _region_balances(_pledge_balances(pledges_df, all_gifts_df))
+
+def _pledge_balances(pledges_df, all_gifts_df):
+    """Per-pledge balances (pledge order): region, balance_2024, balance_2025, balance_total."""
+    n = len(pledges_df)
+    group = _clean_labels(pledges_df["group_title"])
+    ct = pd.Series(_clean_labels(pledges_df["commitment_type"])).str.lower()
+    is_3yr = (ct.str.contains("3-year", regex=False) | ct.str.contains("3 year", regex=False)).to_numpy()
+    is_one_time = (ct == "one-time").to_numpy()
+
+    # Commitments
+    total = pledges_df["total_commitment"].fillna(0.0).to_numpy(dtype="float64")
+    part = np.where(is_3yr, total / 3.0, total)
+    in_2024 = group == "2024"
+    c2024 = np.where(in_2024, part, 0.0)
+    c2025 = np.where(is_one_time & in_2024, 0.0, part)
+
+    # Gifts by labeled group, summed per pledge (bincount adds in link order)
+    rows, gift_ids = _pledge_gift_links(pledges_df)
+    amount, gift_group, _ = _gift_lookup(all_gifts_df, gift_ids)
+    gsum = np.bincount(rows, weights=amount, minlength=n)
+    g2024 = np.bincount(rows, weights=np.where(gift_group == "2024 Gifts", amount, 0.0), minlength=n)
+    g2025 = np.bincount(rows, weights=np.where(gift_group == "2025 Gifts", amount, 0.0), minlength=n)
+
+    # First, apply 2024 gifts to 2024 commitment
+    rem_2024_after_2024gifts = np.maximum(c2024 - g2024, 0.0)
+
+    # Spill 2025 gifts into 2024 up to remaining 2024 balance
+    spill_to_2024 = np.minimum(g2025, rem_2024_after_2024gifts)
+    g2025_after_spill = g2025 - spill_to_2024
+
+    # Final balances
+    out = pd.DataFrame({
+        "region": pledges_df["region"].to_numpy(dtype=object),
+        "balance_2024": np.maximum(c2024 - (g2024 + spill_to_2024), 0.0),
+        "balance_2025": np.maximum(c2025 - g2025_after_spill, 0.0),
+        "balance_total": np.maximum(total - gsum, 0.0),  # total balance unaffected by spill logic
+    })
+    return out
 
-# === usage ===
-region_rev_breakdown = summarize_region_gifts(pledges_df)
-
-# Quick lookup for gift amount by id AND by group/year
-gift_group_by_id = dict(zip(all_gifts_df["gift_id"], all_gifts_df["group_title"]))
-
-def balances_by_region(pledges_df):
-    def is_3yr(s): return bool(s) and ("3-year" in s.lower() or "3 year" in s.lower())
-    def is_one_time(s): return str(s).strip().lower() == "one-time"
-
-    rows = []
-    for _, p in pledges_df.iterrows():
-        group = (p["group_title"] or "").strip()
-        ct = (p["commitment_type"] or "").strip()
-        total = float(p["total_commitment"] or 0.0)
-        part = (total/3.0) if is_3yr(ct) else total
-
-        # Commitments
-        c2024 = part if group == "2024" else 0.0
-        c2025 = 0.0 if (is_one_time(ct) and group == "2024") else part
-        ctotal = total
-
-        # Gifts by labeled group
-        g2024 = g2025 = gsum = 0.0
-        for gid in p["linked_gift_ids"] or []:
-            amt = gift_amount_by_id.get(gid, 0.0)
-            grp = (gift_group_by_id.get(gid) or "").strip()
-            gsum += amt
-            if grp == "2024 Gifts":
-                g2024 += amt
-            elif grp == "2025 Gifts":
-                g2025 += amt
-
-        # First, apply 2024 gifts to 2024 commitment
-        rem_2024_after_2024gifts = max(c2024 - g2024, 0.0)
-
-        # Spill 2025 gifts into 2024 up to remaining 2024 balance
-        spill_to_2024 = min(g2025, rem_2024_after_2024gifts)
-        g2025_after_spill = g2025 - spill_to_2024
-
-        # Final balances
-        b2024 = max(c2024 - (g2024 + spill_to_2024), 0.0)
-        b2025 = max(c2025 - g2025_after_spill, 0.0)
-        btotal = max(ctotal - gsum, 0.0)  # total balance unaffected by spill logic
-
-        rows.append({
-            "region": p["region"],
-            "balance_2024": b2024,
-            "balance_2025": b2025,
-            "balance_total": btotal
-        })
-
-    out = pd.DataFrame(rows)
-    if out.empty:
-        return out
-
+def _region_balances(out):
     agg = out.groupby("region", dropna=False, as_index=False).sum(numeric_only=True)
     for col in ["balance_2024", "balance_2025", "balance_total"]:
-        agg[f"{col}_restricted"] = agg[col] * 0.70
-        agg[f"{col}_unrestricted"] = agg[col] * 0.30
+        agg[f"{col}_restricted"] = agg[col] * RESTRICTED_SHARE
+        agg[f"{col}_unrestricted"] = agg[col] * UNRESTRICTED_SHARE
     return agg
 
-region_balances = balances_by_region(pledges_df)
+
+# === incremental aggregate cube ===
+# Both reports are rollups of small state tables kept with every snapshot:
+#   cube_cells     (region, mapped_class, gift_group) → linked gift amount, links
+#   cube_regions   region → summed pledge balances, pledges
+#   cube_contrib   per pledge: what it adds to the cells
+#   cube_balances  per pledge: its balances (what it adds to its region)
+# A refresh recomputes only the pledges a change touches — changed or removed
+# pledges, and pledges linking a changed or removed gift — subtracting their old
+# contributions and adding the new ones. Sums are maintained by addition, so the
+# cube is rebuilt from scratch after a full sync and every CUBE_REBUILD_EVERY updates.
+CUBE_FRAMES = ("cube_cells", "cube_regions", "cube_contrib", "cube_balances")
+CUBE_REBUILD_EVERY = int(os.getenv("REGION_REV_CUBE_REBUILD_EVERY", "100"))
+CELL_KEYS = ["region", "mapped_class", "gift_group"]
+BALANCE_COLS = ["balance_2024", "balance_2025", "balance_total"]
+
+def _cube_contributions(pledges_df, all_gifts_df):
+    """Per pledge and cell: linked gift amount and number of links."""
+    rows, gift_ids = _pledge_gift_links(pledges_df)
+    amount, group, mapped_class = _gift_lookup(all_gifts_df, gift_ids)
+    detail = pd.DataFrame({
+        "pledge_id": pledges_df["pledge_id"].to_numpy(dtype="int64")[rows],
+        "region": pledges_df["region"].to_numpy(dtype=object)[rows],
+        "mapped_class": mapped_class,
+        "gift_group": group,
+        "amount": amount,
+        "links": np.ones(len(rows), dtype="int64"),
+    })
+    return detail.groupby(["pledge_id"] + CELL_KEYS, dropna=False, as_index=False, sort=False)[["amount", "links"]].sum()
+
+def _cube_balances(pledges_df, all_gifts_df):
+    if pledges_df.empty:
+        return pd.DataFrame({"pledge_id": pd.Series(dtype="int64"), "region": pd.Series(dtype=object),
+                             **{c: pd.Series(dtype="float64") for c in BALANCE_COLS}})
+    out = _pledge_balances(pledges_df, all_gifts_df)
+    out.insert(0, "pledge_id", pledges_df["pledge_id"].to_numpy(dtype="int64"))
+    return out
+
+def _merge_sums(table, keys, plus, minus, count_col):
+    """table + plus − minus, summed by keys; rows whose count drops to 0 disappear."""
+    cols = [c for c in table.columns if c not in keys]
+    minus = minus[keys + cols].copy()
+    minus[cols] = -minus[cols]
+    merged = (
+        pd.concat([table[keys + cols], plus[keys + cols], minus], ignore_index=True)
+        .groupby(keys, dropna=False, as_index=False, sort=False)[cols]
+        .sum()
+    )
+    return merged[merged[count_col] != 0].reset_index(drop=True)
+
+def build_cube(pledges_df, all_gifts_df):
+    """The cube state tables, computed from scratch."""
+    contrib = _cube_contributions(pledges_df, all_gifts_df)
+    balances = _cube_balances(pledges_df, all_gifts_df)
+    return {
+        "cube_cells": contrib.groupby(CELL_KEYS, dropna=False, as_index=False)[["amount", "links"]].sum(),
+        "cube_regions": balances.assign(pledges=1).groupby("region", dropna=False, as_index=False)[BALANCE_COLS + ["pledges"]].sum(),
+        "cube_contrib": contrib,
+        "cube_balances": balances,
+    }
+
+def update_cube(cube, pledges_df, all_gifts_df, pledge_ids):
+    """
+    Re-derive the contributions of `pledge_ids` from the current frames and
+    swap them into the cube; everything else is left as it was.
+    """
+    ids = np.fromiter(pledge_ids, dtype="int64", count=len(pledge_ids))
+    contrib, balances = cube["cube_contrib"], cube["cube_balances"]
+    old_contrib_mask = contrib["pledge_id"].isin(ids).to_numpy()
+    old_balance_mask = balances["pledge_id"].isin(ids).to_numpy()
+    current = pledges_df[pledges_df["pledge_id"].isin(ids).to_numpy()]
+
+    new_contrib = _cube_contributions(current, all_gifts_df)
+    new_balances = _cube_balances(current, all_gifts_df)
+    return {
+        "cube_cells": _merge_sums(cube["cube_cells"], CELL_KEYS, new_contrib, contrib[old_contrib_mask], "links"),
+        "cube_regions": _merge_sums(cube["cube_regions"], ["region"], new_balances.assign(pledges=1),
+                                    balances[old_balance_mask].assign(pledges=1), "pledges"),
+        "cube_contrib": pd.concat([contrib[~old_contrib_mask], new_contrib], ignore_index=True),
+        "cube_balances": pd.concat([balances[~old_balance_mask], new_balances], ignore_index=True),
+    }
+
+def affected_pledges(pledges_df, deltas):
+    """Pledge ids to recompute: changed/removed pledges and pledges linking a changed/removed gift."""
+    ids = {int(i) for i in deltas["pledges"]["changed"] + deltas["pledges"]["removed"]}
+    gift_ids = {int(i) for name in ("gifts_2025", "gifts_old")
+                for i in deltas[name]["changed"] + deltas[name]["removed"]}
+    if gift_ids:
+        rows, linked = _pledge_gift_links(pledges_df)
+        hit = np.isin(linked, np.fromiter(gift_ids, dtype="int64", count=len(gift_ids)))
+        ids.update(pledges_df["pledge_id"].to_numpy(dtype="int64")[np.unique(rows[hit])].tolist())
+    return ids
+
+def cube_breakdown(cube):
+    """region_rev_breakdown, rolled up from the cube's cells."""
+    cells = cube["cube_cells"]
+    if cells.empty:
+        return pd.DataFrame(columns=["region", "mapped_class", "amount", "additions_2024", "additions_2025"])
+    amount = cells["amount"].to_numpy(dtype="float64")
+    by_region_class = (
+        cells.assign(additions_2024=np.where(cells["gift_group"] == "2024 Gifts", amount, 0.0),
+                     additions_2025=np.where(cells["gift_group"] == "2025 Gifts", amount, 0.0))
+        .groupby(["region", "mapped_class"], dropna=False, as_index=False)[["amount", "additions_2024", "additions_2025"]]
+        .sum()
+    )
+    return _breakdown_rollups(by_region_class)
+
+def cube_balances(cube):
+    """region_balances, rolled up from the cube's per-region balances."""
+    regions = cube["cube_regions"]
+    return pd.DataFrame() if regions.empty else _region_balances(regions[["region"] + BALANCE_COLS])
+
+CUBE_REPORTS = (("region_rev_breakdown", cube_breakdown), ("region_balances", cube_balances))
+
+def cube_reports(cube):
+    """region_rev_breakdown and region_balances, rolled up from the cube."""
+    return {name: fn(cube) for name, fn in CUBE_REPORTS}
+
+
+# === pipeline ===
+# Nothing above touches the network at import time. The stages below only run
+# when called: fetch (raw items) → parse (DataFrames + donor map) → aggregate
+# (report frames) → persist (versioned on-disk snapshot). load_snapshot()/
+# build_reports() serve the latest persisted snapshot and only contact monday
+# when asked to refresh (or when no snapshot has ever been written).
+
+def parse_boards(raw, outputs=None, sync_donors=True):
+    """
+    Parse stage: raw item lists → DataFrames and the donor map. `outputs` must
+    match what fetch_raw_boards() was given (it decides which columns exist).
+    sync_donors=False serves cached donors as they are (see fetch_donor_items_by_id).
+    """
+    outputs = PIPELINE_OUTPUTS if outputs is None else outputs
+    need = fields_for(outputs)
+    with metrics.stage("parse", board="pledges") as s:
+        pledges_df = pledges_to_df(raw["pledges"], need["pledges"])
+        s["rows"] = len(pledges_df)
+    with metrics.stage("parse", board="gifts_2025") as s:
+        gifts25_df = gifts_to_df(raw["gifts_2025"], is_2025=True, wanted=need["gifts"])
+        s["rows"] = len(gifts25_df)
+    with metrics.stage("parse", board="gifts_old") as s:
+        gifts_old_df = gifts_to_df(raw["gifts_old"], is_2025=False, wanted=need["gifts"])
+        s["rows"] = len(gifts_old_df)
+    return _assemble_snapshot(pledges_df, gifts25_df, gifts_old_df, outputs, donor_items=raw.get("donors"),
+                              sync_donors=sync_donors)
+
+def stream_snapshot(outputs=None):
+    """
+    Fetch + parse fused: every board is streamed page by page into column
+    buffers, so peak memory is about one raw page per board plus the final
+    columns. This bypasses the incremental item store (which keeps raw items).
+    """
+    outputs = PIPELINE_OUTPUTS if outputs is None else outputs
+    plans = {name: fetch_plan(name, outputs) for name in BOARDS}
+    for name, plan in plans.items():
+        check_column_types(plan["board_id"], BOARDS[name][1], plan["column_ids"])
+    if needs_donors(outputs):
+        check_column_types(BOARD_DONORS, DONOR_FIELDS)
+    buffers = {
+        "pledges": lambda: pledge_buffers(plans["pledges"]["wanted"]),
+        "gifts_2025": lambda: gift_buffers(True, plans["gifts_2025"]["wanted"]),
+        "gifts_old": lambda: gift_buffers(False, plans["gifts_old"]["wanted"]),
+    }
+    frames = fetch_boards_concurrently({
+        name: lambda name=name, p=plan: stream_board(
+            p["board_id"], buffers[name](), query_params=p["query_params"],
+            column_ids=p["column_ids"], item_fields=p["item_fields"], keep=p["keep"])
+        for name, plan in plans.items()
+    })
+    return _assemble_snapshot(frames["pledges"], frames["gifts_2025"], frames["gifts_old"], outputs)
+
+def _assemble_snapshot(pledges_df, gifts25_df, gifts_old_df, outputs, donor_items=None, sync_donors=True):
+    candidate_donor_ids, donor_map = set(), {}
+    if needs_donors(outputs):
+        with metrics.stage("donors") as s:
+            candidate_donor_ids = candidate_donor_ids_from(gifts25_df, gifts_old_df)
+            donor_map = fetch_donors_map(candidate_donor_ids, all_items=donor_items, sync_changed=sync_donors)
+            s["rows"] = len(donor_map)
+    donor_clusters = pd.DataFrame(columns=dedup.CLUSTER_COLUMNS)
+    if "donor_clusters" in outputs:
+        with metrics.stage("dedup") as s:
+            donor_clusters = dedup.cluster_people(dedup.people_from(donor_map, pledges_df))
+            s["rows"] = len(donor_clusters)
+    return {
+        "pledges_df": pledges_df,
+        "gifts25_df": gifts25_df,
+        "gifts_old_df": gifts_old_df,
+        "all_gifts_df": concat_frames([gifts25_df, gifts_old_df]),
+        "candidate_donor_ids": candidate_donor_ids,
+        "donor_map": donor_map,
+        "donor_clusters": donor_clusters,
+    }
+
+def aggregate(snapshot):
+    """Aggregate stage: parsed snapshot → the two report frames."""
+    reports = {}
+    for name, fn in (("region_rev_breakdown", summarize_region_gifts), ("region_balances", balances_by_region)):
+        with metrics.stage("aggregate", report=name) as s:
+            reports[name] = fn(snapshot["pledges_df"], snapshot["all_gifts_df"])
+            s["rows"] = len(reports[name])
+    return reports
+
+def _cube_key():
+    """A persisted cube is only reusable under the same board filters."""
+    spec = {board: [[type(f).__name__, vars(f)] for f in flts] for board, flts in BOARD_FILTERS.items()}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+def _previous_cube(deltas):
+    """(cube frames, cube manifest entry) of the latest snapshot if `deltas` continue exactly from it."""
+    if not deltas or any(name not in deltas or deltas[name]["full"] for name in BOARDS):
+        return None
+    manifest = snapshot_store.read_manifest()
+    meta = (manifest or {}).get("cube")
+    if (not meta or meta["key"] != _cube_key() or meta["updates"] + 1 >= CUBE_REBUILD_EVERY
+            or any(deltas[name]["base"] != meta["synced_at"].get(name) for name in BOARDS)):
+        return None  # e.g. a sync whose snapshot never got written: its changes aren't in the cube
+    frames, _ = snapshot_store.read(manifest["version"], names=CUBE_FRAMES)
+    return frames, meta
+
+def aggregate_cube(snapshot, deltas=None):
+    """
+    Aggregate stage via the cube: update the latest snapshot's cube with the
+    sync deltas when they continue from it, else build it from scratch.
+    Returns (reports, cube frames, cube manifest entry). Keeping the cube is
+    one stage; each report rolled up from it is an aggregate stage, labelled
+    like the ones aggregate() times.
+    """
+    with metrics.stage("cube") as s:
+        previous = _previous_cube(deltas)
+        if previous is None:
+            cube = build_cube(snapshot["pledges_df"], snapshot["all_gifts_df"])
+            meta = {"mode": "build", "updates": 0, "pledges_recomputed": len(snapshot["pledges_df"])}
+        else:
+            cube, prev_meta = previous
+            pledge_ids = affected_pledges(snapshot["pledges_df"], deltas)
+            if pledge_ids:
+                cube = update_cube(cube, snapshot["pledges_df"], snapshot["all_gifts_df"], pledge_ids)
+            meta = {"mode": "update", "updates": prev_meta["updates"] + 1, "pledges_recomputed": len(pledge_ids)}
+        s["mode"] = meta["mode"]
+        s["rows"] = s["pledges_recomputed"] = meta["pledges_recomputed"]
+    reports = {}
+    for name, fn in CUBE_REPORTS:
+        with metrics.stage("aggregate", report=name) as s:
+            reports[name] = fn(cube)
+            s["rows"] = len(reports[name])
+    meta["key"] = _cube_key()
+    meta["synced_at"] = {name: d.get("synced_at") for name, d in (deltas or {}).items()}
+    return reports, cube, meta
+
+# Streaming trades the incremental item store for bounded memory (small containers)
+STREAMING = os.getenv("MONDAY_STREAMING", "").lower() in ("1", "true", "yes")
+
+SNAPSHOT_DIR = os.getenv("REGION_REV_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_KEEP = int(os.getenv("REGION_REV_SNAPSHOT_KEEP", "10"))
+snapshot_store = SnapshotStore(SNAPSHOT_DIR)
+
+# Every persisted version is also appended to the history store (history.py),
+# which keeps only changed rows, so past versions stay readable long after
+# SNAPSHOT_KEEP has pruned their snapshots. "" turns it off.
+HISTORY_DIR = os.getenv("REGION_REV_HISTORY_DIR", "history")
+HISTORY_TABLES = {"pledges_df": "pledge_id", "gifts25_df": "gift_id", "gifts_old_df": "gift_id"}
+history_store = HistoryStore(HISTORY_DIR) if HISTORY_DIR else None
+
+PARSED_FRAMES = ("pledges_df", "gifts25_df", "gifts_old_df", "donors_df")
+REPORT_FRAMES = ("region_rev_breakdown", "region_balances")
+
+def donor_map_to_df(donor_map):
+    df = pd.DataFrame.from_dict(donor_map, orient="index", columns=DONOR_MAP_FIELDS)
+    return df.rename_axis("donor_id").reset_index()
+
+def donor_map_from_df(donors_df):
+    return donors_df.set_index("donor_id")[DONOR_MAP_FIELDS].to_dict(orient="index")
+
+def run_pipeline():
+    """
+    fetch → parse → aggregate, then persist everything as a new snapshot
+    version. Aggregation goes through the cube, so a small change only
+    recomputes the pledges it touches. Instrumented as one metrics run; the stage numbers up to the
+    write are kept in the version's manifest.
+    """
+    outputs = PIPELINE_OUTPUTS
+    with metrics.run("pipeline") as run:
+        if STREAMING:
+            snapshot, deltas = stream_snapshot(outputs), None  # no item store, so no deltas: the cube is rebuilt
+        else:
+            raw = fetch_raw_boards(outputs)
+            snapshot, deltas = parse_boards(raw, outputs), raw["deltas"]
+        reports, cube, cube_meta = aggregate_cube(snapshot, deltas)
+        persist(snapshot, reports, cube, {"outputs": list(outputs), "cube": cube_meta}, run)
+    return snapshot, reports
+
+def persist(snapshot, reports, cube, meta, run):
+    """Persist stage: write everything as a new snapshot version (sets snapshot["version"])."""
+    with metrics.stage("persist") as s:
+        frames = {name: snapshot[name] for name in ("pledges_df", "gifts25_df", "gifts_old_df")}
+        frames["donors_df"] = donor_map_to_df(snapshot["donor_map"])
+        frames["donor_clusters"] = snapshot["donor_clusters"]
+        frames.update(reports)
+        frames.update(cube)
+        snapshot["version"] = snapshot_store.write(frames, meta={**meta, "metrics": run.as_dict()})
+        snapshot_store.prune(SNAPSHOT_KEEP)
+        s["rows"] = sum(len(df) for df in frames.values())
+    if history_store is not None:
+        with metrics.stage("history") as s:
+            created_at = snapshot_store.read_manifest(snapshot["version"])["created_at"]
+            entry = history_store.append(snapshot["version"], {name: snapshot[name] for name in HISTORY_TABLES},
+                                         HISTORY_TABLES, created_at=created_at)
+            s["rows"] = sum(t["new_rows"] for t in entry["tables"].values())
+
+def read_persisted_snapshot(version=None):
+    """Parsed frames of a persisted version (memory-mapped), in load_snapshot()'s shape."""
+    manifest = snapshot_store.read_manifest(version)
+    names = [n for n in PARSED_FRAMES + ("donor_clusters",) if n in (manifest or {}).get("rows", PARSED_FRAMES)]
+    frames, manifest = snapshot_store.read(version, names=names)
+    gifts25_df, gifts_old_df = frames["gifts25_df"], frames["gifts_old_df"]
+    return {
+        "pledges_df": frames["pledges_df"],
+        "gifts25_df": gifts25_df,
+        "gifts_old_df": gifts_old_df,
+        "all_gifts_df": concat_frames([gifts25_df, gifts_old_df]),
+        "candidate_donor_ids": candidate_donor_ids_from(gifts25_df, gifts_old_df),
+        "donor_map": donor_map_from_df(frames["donors_df"]),
+        "donor_clusters": frames.get("donor_clusters", pd.DataFrame(columns=dedup.CLUSTER_COLUMNS)),
+        "version": manifest["version"],
+    }
+
+def read_persisted_reports(version=None):
+    frames, _ = snapshot_store.read(version, names=REPORT_FRAMES)
+    return frames
+
+def history_versions():
+    """Log entries (version, created_at, per-table row counts) of the history, oldest first."""
+    return history_store.versions() if history_store is not None else []
+
+def history_snapshot(version: str):
+    """Parsed pledge and gift frames of any version in the history (no donor map)."""
+    if history_store is None:
+        raise RuntimeError("The snapshot history is off (REGION_REV_HISTORY_DIR is empty).")
+    frames = history_store.read(version, tables=HISTORY_TABLES)
+    return {**frames, "all_gifts_df": concat_frames([frames["gifts25_df"], frames["gifts_old_df"]]),
+            "version": version}
+
+def reports_as_of(version: str = None, when=None):
+    """
+    The two report frames as of a past version (or the newest one at or before
+    `when`), computed by today's report logic from the history's frames.
+    """
+    if version is None:
+        version = history_store.version_at(when) if history_store is not None else None
+        if version is None:
+            raise LookupError(f"No history version at or before {when}.")
+    snapshot = history_snapshot(version)
+    return {
+        "region_rev_breakdown": summarize_region_gifts(snapshot["pledges_df"], snapshot["all_gifts_df"]),
+        "region_balances": balances_by_region(snapshot["pledges_df"], snapshot["all_gifts_df"]),
+    }
+
+class ServedSnapshot:
+    """
+    One snapshot version as handed to readers. It is replaced as a whole on
+    refresh (a single reference swap), so a reader holding it always sees one
+    complete, consistent version. Frames not needed yet are read from disk lazily.
+    """
+
+    def __init__(self, version: str, snapshot=None, reports=None):
+        self.version = version
+        self._snapshot = snapshot
+        self._reports = reports
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self):
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = read_persisted_snapshot(self.version)
+            return self._snapshot
+
+    @property
+    def reports(self):
+        with self._lock:
+            if self._reports is None:
+                self._reports = read_persisted_reports(self.version)
+            return self._reports
+
+_served = None                      # current ServedSnapshot
+_served_lock = threading.Lock()     # guards the swap, never held during a pipeline run
+_write_lock = threading.Lock()      # one writer of the item store + snapshots at a time (refresh or webhook batch)
+_inflight = None                    # Future of the refresh currently running, if any
+_inflight_lock = threading.Lock()
+
+def refresh_snapshot() -> str:
+    """
+    Run the pipeline and atomically swap the new snapshot in; returns its
+    version. Single-flight: if a refresh is already running, callers wait for
+    that run's result instead of starting another board pull.
+    """
+    global _inflight
+    with _inflight_lock:
+        flight = _inflight
+        leader = flight is None
+        if leader:
+            flight = _inflight = Future()
+    if not leader:
+        return flight.result()
+
+    try:
+        with _write_lock:
+            snapshot, reports = run_pipeline()
+            version = _serve(snapshot, reports)
+        flight.set_result(version)
+        return version
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight = None
+
+def _serve(snapshot, reports) -> str:
+    """Swap a freshly persisted snapshot in for readers; returns its version."""
+    global _served
+    served = ServedSnapshot(snapshot["version"], snapshot, reports)
+    with _served_lock:
+        _served = served
+    return served.version
+
+def served_snapshot() -> ServedSnapshot:
+    """The snapshot currently being served (latest on disk, or a first pipeline run)."""
+    global _served
+    with _served_lock:
+        if _served is None:
+            version = snapshot_store.latest()
+            if version is not None:
+                _served = ServedSnapshot(version)
+        served = _served
+    if served is None:
+        # Nothing has ever been saved: the first callers wait for one (shared) run
+        refresh_snapshot()
+        with _served_lock:
+            served = _served
+    return served
+
+def load_snapshot(refresh: bool = False):
+    """Parsed frames + donor map from the latest snapshot (refresh=True re-runs the pipeline)."""
+    if refresh:
+        refresh_snapshot()
+    return served_snapshot().snapshot
+
+def build_reports(refresh: bool = False):
+    """{"region_rev_breakdown": df, "region_balances": df} from the latest snapshot (refresh=True re-runs the pipeline)."""
+    if refresh:
+        refresh_snapshot()
+    return served_snapshot().reports
+
+def current_version() -> str:
+    """Version id of the snapshot being served; cheap, so it works as a cache key."""
+    return served_snapshot().version
+
+def reports_for_version(version: str):
+    """Report frames of one specific version (in memory if it is the current one)."""
+    served = served_snapshot()
+    if served.version == version:
+        return served.reports
+    return read_persisted_reports(version)
+
+def snapshot_manifest():
+    """Manifest (version, created_at, row counts) of the snapshot currently being served."""
+    with _served_lock:
+        version = _served.version if _served is not None else snapshot_store.latest()
+    return snapshot_store.read_manifest(version) if version else None
+
+# === webhook ingestion ===
+# monday board webhooks (webhooks.py) are applied to the raw items in the item
+# store, the same per-board snapshots incremental syncs merge into. Column
+# changes are patched in place through the board's column mapping, created /
+# renamed / moved items are re-read by id, deleted ones are dropped; the frames
+# are then re-parsed from the store and the cube is updated with just those
+# items, without asking monday for anything else. The store keeps its sync
+# time, so the next polling refresh still re-reads everything changed since
+# then: a lost webhook only delays a change.
+
+WEBHOOK_BOARDS = {board_id for board_id, _ in BOARDS.values()} | {BOARD_DONORS}
+WEBHOOK_BATCH_SECONDS = float(os.getenv("REGION_REV_WEBHOOK_BATCH_SECONDS", "5"))
+WEBHOOK_TOKEN = os.getenv("REGION_REV_WEBHOOK_TOKEN")    # required as ?token=...; without it only localhost is served
+WEBHOOK_RECORD = os.getenv("REGION_REV_WEBHOOK_RECORD")  # append every payload here (JSON lines) for replays
+# With no item store to patch, a batch falls back to a full refresh, at most this often
+WEBHOOK_FALLBACK_SECONDS = float(os.getenv("REGION_REV_WEBHOOK_FALLBACK_SECONDS", "900"))
+_last_fallback = None  # time.monotonic() of the last fallback refresh
+
+def _webhook_targets(outputs):
+    """Board id → (name, item store key, fetch plan) for every stored board a webhook can patch."""
+    targets = {}
+    for name in BOARDS:
+        plan = fetch_plan(name, outputs)
+        key = _store_key(plan["board_id"], plan["column_ids"], plan["query_params"], plan["item_fields"])
+        targets[plan["board_id"]] = (name, key, plan)
+    if needs_donors(outputs):
+        by_board = DONOR_LOOKUP == "board"
+        plan = {"board_id": BOARD_DONORS, "column_ids": DONOR_COLS, "query_params": None, "keep": None,
+                "item_fields": ITEM_FIELDS if by_board else ("name",),
+                "cached_only": not by_board}  # the by-id cache only holds donors some gift links
+        targets[BOARD_DONORS] = ("donors", _store_key(BOARD_DONORS, DONOR_COLS) if by_board else DONOR_CACHE_KEY, plan)
+    return targets
+
+def _patch_items(items_by_id, events, plan):
+    """
+    Apply one board's events, in order, to its stored raw items. Returns
+    (ids to re-read from monday, ids deleted).
+    """
+    filter_cols = {r["column_id"] for r in (plan["query_params"] or {}).get("rules") or []}
+    reread, deleted = set(), set()
+    for ev in events:
+        item_id = ev["item_id"]
+        if plan.get("cached_only") and item_id not in items_by_id:
+            continue
+        if ev["kind"] == "delete":
+            items_by_id.pop(item_id, None)
+            reread.discard(item_id)
+            deleted.add(item_id)
+            continue
+        if ev["kind"] == "column":
+            col = ev["column_id"]
+            if col not in plan["column_ids"] and col not in filter_cols:
+                continue  # a column no report reads
+            cv = webhooks.column_value(col, ev["column_type"], ev["value"])
+            item = items_by_id.get(item_id)
+            if cv is not None and item is not None and item_id not in reread and col not in filter_cols:
+                item["column_values"] = [c for c in item["column_values"] if c["id"] != col] + [cv]
+                item["updated_at"] = ev["changed_at"] or item.get("updated_at")
+                continue
+            # Untranslated type, an item we don't hold, or a filtered column (it may enter/leave the board's filter)
+        deleted.discard(item_id)
+        reread.add(item_id)
+    return reread, deleted
+
+def _apply_webhook_batch(by_board, targets, outputs):
+    stored = {board_id: item_store.load(key) for board_id, (_, key, _) in targets.items()}
+    if STREAMING or any(stored[board_id] is None for board_id, (name, _, _) in targets.items() if name in BOARDS):
+        return None
+
+    with metrics.run("webhooks") as run:
+        raw, deltas = {}, {}
+        for board_id, (name, key, plan) in targets.items():
+            snap = stored[board_id]
+            if snap is None:
+                continue  # donor cache not started yet: the donor lookup fills it
+            items_by_id, events, changed, deleted = snap["items"], by_board.get(board_id, []), [], set()
+            if events:
+                with metrics.stage("webhooks", board=name) as s:
+                    reread, deleted = _patch_items(items_by_id, events, plan)
+                    if reread:
+                        fetched = {it["id"]: it for it in fetch_board_items_by_id(
+                            board_id, sorted(reread), plan["column_ids"], plan["query_params"], plan["item_fields"])}
+                        items_by_id.update(fetched)
+                        for item_id in reread - set(fetched):
+                            items_by_id.pop(item_id, None)  # deleted, archived or now outside the filter
+                            deleted.add(item_id)
+                    changed = sorted({ev["item_id"] for ev in events} & set(items_by_id))
+                    item_store.save(key, snap["synced_at"], items_by_id, snap.get("unchecked_syncs", 0))
+                    s["rows"] = len(events)
+            if name in BOARDS:
+                delta = {"full": False, "base": snap["synced_at"], "synced_at": snap["synced_at"],
+                         "changed": changed, "removed": sorted(deleted)}
+                raw[name], deltas[name] = keep_with_delta(list(items_by_id.values()), delta, plan["keep"])
+            elif DONOR_LOOKUP == "board":
+                raw["donors"] = list(items_by_id.values())
+
+        snapshot = parse_boards(raw, outputs, sync_donors=False)
+        reports, cube, cube_meta = aggregate_cube(snapshot, deltas)
+        meta = {"outputs": list(outputs), "cube": cube_meta,
+                "webhook_events": sum(len(evs) for evs in by_board.values())}
+        persist(snapshot, reports, cube, meta, run)
+    return _serve(snapshot, reports)
+
+def apply_webhook_events(events, outputs=None):
+    """
+    Apply a batch of webhook events (webhooks.parse_event dicts) and serve the
+    result as a new snapshot version; returns the version (None if no event
+    concerned a board we use). While there is no item store to patch (first
+    run, or streaming mode, which keeps none) it falls back to a regular
+    refresh, at most once per WEBHOOK_FALLBACK_SECONDS; batches in between
+    return None and are left to the polling refresh.
+    """
+    global _last_fallback
+    outputs = PIPELINE_OUTPUTS if outputs is None else outputs
+    targets = _webhook_targets(outputs)
+    by_board = {}
+    for ev in events:
+        if ev["board_id"] in targets:
+            by_board.setdefault(ev["board_id"], []).append(ev)
+    if not by_board:
+        return None
+    with _write_lock:
+        version = _apply_webhook_batch(by_board, targets, outputs)
+        if version is not None:
+            return version
+        now = time.monotonic()
+        if _last_fallback is not None and now - _last_fallback < WEBHOOK_FALLBACK_SECONDS:
+            return None
+        _last_fallback = now
+    return refresh_snapshot()
+
+def start_webhook_receiver(port: int, host: str = "0.0.0.0"):
+    """
+    Serve monday webhooks at http://host:port/monday/webhook and apply them in
+    batches. Needs REGION_REV_WEBHOOK_TOKEN unless host is a loopback address.
+    """
+    receiver = webhooks.WebhookReceiver(apply_webhook_events, boards=WEBHOOK_BOARDS,
+                                        batch_seconds=WEBHOOK_BATCH_SECONDS, token=WEBHOOK_TOKEN,
+                                        record_path=WEBHOOK_RECORD)
+    return receiver.start(port, host)
+
+_REPORT_NAMES = {"region_rev_breakdown", "region_balances"}
+_SNAPSHOT_NAMES = {"pledges_df", "gifts25_df", "gifts_old_df", "all_gifts_df", "candidate_donor_ids", "donor_map",
+                   "donor_clusters"}
+
+def __getattr__(name):
+    # Keep `from monday_to_df import region_rev_breakdown` working, lazily.
+    if name in _REPORT_NAMES:
+        return build_reports()[name]
+    if name in _SNAPSHOT_NAMES:
+        return load_snapshot()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    snap = load_snapshot()
+    donor_map = snap["donor_map"]
+    print("Candidate donor IDs collected:", len(snap["candidate_donor_ids"]))
+    print("Valid donor IDs fetched   :", len(donor_map))
+    print("Sample donors:")
+    for k, v in list(donor_map.items())[:5]:
+        print(k, "→", v)
+    reports = build_reports()
+    print(reports["region_rev_breakdown"])
+    print(reports["region_balances"])
+    run = metrics.last_run() or (snapshot_manifest() or {}).get("metrics")
+    if run:
+        print(pd.DataFrame(run["stages"] + [run["total"]]).to_string(index=False))
 
@@ -0,0 +1,88 @@
+"""
+Background snapshot refresher.
+
+Runs a refresh function on a daemon thread every `interval` seconds (and on
+demand via trigger()), so rebuilding the snapshot never happens on a user's
+request path. Readers keep getting the last good snapshot until the new one
+is swapped in; a failed run is recorded and retried at the next tick.
+"""
+
+import time, threading
+from datetime import datetime, timezone
+
+
+class BackgroundRefresher:
+    def __init__(self, refresh_fn, interval: float, name: str = "snapshot-refresher"):
+        self.refresh_fn = refresh_fn
+        self.interval = interval  # seconds; 0 = only when triggered
+        self.name = name
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {
+            "running": False,
+            "runs": 0,
+            "failures": 0,
+            "last_started": None,
+            "last_finished": None,
+            "last_duration_s": None,
+            "last_error": None,
+            "last_result": None,
+            "next_run": None,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def trigger(self):
+        """Ask for a refresh as soon as possible (no-op if one is already running)."""
+        with self._lock:
+            if not self._status["running"]:
+                self._wake.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _set(self, **kw):
+        with self._lock:
+            self._status.update(kw)
+
+    def _run(self):
+        while not self._stop.is_set():
+            timeout = self.interval if self.interval > 0 else None
+            if timeout is not None:
+                self._set(next_run=datetime.fromtimestamp(time.time() + timeout, timezone.utc).isoformat())
+            self._wake.wait(timeout)
+            if self._stop.is_set():
+                break
+
+            started = time.monotonic()
+            self._set(running=True, last_started=datetime.now(timezone.utc).isoformat(), next_run=None)
+            try:
+                result = self.refresh_fn()
+            except Exception as e:
+                with self._lock:
+                    self._status["failures"] += 1
+                    self._status["last_error"] = f"{type(e).__name__}: {e}"
+            else:
+                self._set(last_error=None, last_result=result)
+            finally:
+                with self._lock:
+                    self._status["runs"] += 1
+                    self._status["running"] = False
+                    self._status["last_finished"] = datetime.now(timezone.utc).isoformat()
+                    self._status["last_duration_s"] = round(time.monotonic() - started, 3)
+                    self._wake.clear()  # triggers that came in during the run are covered by it
@@ -0,0 +1,85 @@
+"""
+Report layer: turns the two report frames into the regional table.
+
+No Streamlit here, so the app, scripts and batch exports share one definition.
+"""
+
+import pandas as pd
+
+REGION_ORDER = [
+    "Africa",
+    "Latin America",
+    "Central Asia",
+    "South Asia",
+    "Middle East",
+    "Greatest Need",
+    "New Regions",
+]
+
+ROW_LABELS = [
+    "Addition Scholars (2025)",
+    "Addition Global (2025)",
+    "Pledged but not received",
+    "Addition Unrestricted (2025)",
+]
+
+
+def _safe_num(s: pd.Series) -> pd.Series:
+    """Column-wise float(x) with anything unparseable → 0.0."""
+    return pd.to_numeric(s, errors="coerce").astype("float64").fillna(0.0)
+
+
+def build_table(region_rev_breakdown: pd.DataFrame, region_balances: pd.DataFrame) -> pd.DataFrame:
+    # Normalize expected columns
+    rr = region_rev_breakdown.copy()
+    rb = region_balances.copy()
+
+    # Ensure required columns exist
+    for col in ["region", "mapped_class", "additions_2025"]:
+        if col not in rr.columns:
+            rr[col] = None
+    for col in ["region", "balance_total"]:
+        if col not in rb.columns:
+            rb[col] = 0.0
+
+    rr["region"] = rr["region"].astype(str)
+    rr["mapped_class"] = rr["mapped_class"].astype(str)
+
+    # Aggregate just in case there are multiple rows per region/class
+    agg_rr = (
+        rr.groupby(["region", "mapped_class"], dropna=False, as_index=False)["additions_2025"]
+        .sum()
+    )
+
+    # Helper to get a series (indexed by region) for a given class -> additions_2025
+    def values_for_class(class_name: str) -> pd.Series:
+        sub = agg_rr[agg_rr["mapped_class"] == class_name]
+        return _safe_num(sub.set_index("region")["additions_2025"])
+
+    # Row 1: Restricted - MD Scholars (2025)
+    r1 = values_for_class("Restricted - MD Scholars")
+
+    # Row 2: Restricted - Global Work (2025)
+    r2 = values_for_class("Restricted - Global Work")
+
+    # Row 3: Pledged but not received (balance_total from region_balances)
+    r3 = _safe_num(rb.set_index("region")["balance_total"])
+
+    # Row 4: Unrestricted (2025)
+    r4 = values_for_class("Unrestricted")
+
+    # Combine into one DataFrame with our explicit row order
+    combined = pd.DataFrame({
+        "Addition Scholars (2025)": r1,
+        "Addition Global (2025)": r2,
+        "Pledged but not received": r3,
+        "Addition Unrestricted (2025)": r4,
+    }).fillna(0.0)
+
+    # Reindex columns for region order (axis=1), and index (rows) for row labels
+    combined = combined.T  # rows -> labels, columns -> regions
+    combined = combined.reindex(REGION_ORDER, axis=1)  # enforce region order
+    combined = combined.reindex(ROW_LABELS, axis=0)    # enforce row order
+
+    # Ensure numeric (regions with no data stay NaN, as before)
+    return combined.astype("float64")
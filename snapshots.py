@@ -0,0 +1,138 @@
+"""
+Versioned on-disk snapshots of the parsed frames and the report frames.
+
+Each version is a directory of uncompressed Arrow IPC files plus a
+manifest.json; a LATEST file names the current version. Files are read back
+memory-mapped, so loading the latest snapshot at startup costs milliseconds
+and never touches the monday API.
+
+    snapshots/
+      LATEST                     -> "20251028T141502Z-3f9a1c2b"
+      20251028T141502Z-3f9a1c2b/
+        manifest.json
+        pledges_df.arrow
+        ...
+"""
+
+import os, json, shutil, hashlib, threading
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+FORMAT_VERSION = 1
+
+
+def _frame_to_table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+
+
+def _table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Arrow → pandas keeping our dtypes: list columns stay Arrow-backed and
+    columns written as string[pyarrow] are wrapped without a copy (pandas'
+    own metadata would bring them back as Python-object strings).
+    """
+    meta = table.schema.pandas_metadata or {}
+    text_cols = [c["name"] for c in meta.get("columns", []) if c.get("numpy_type") == "string"]
+    list_mapper = lambda t: pd.ArrowDtype(t) if pa.types.is_list(t) or pa.types.is_large_list(t) else None
+
+    df = table.drop_columns(text_cols).to_pandas(types_mapper=list_mapper)
+    for name in text_cols:
+        df[name] = pd.arrays.ArrowStringArray(table.column(name))
+    return df[table.column_names]
+
+
+class SnapshotStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def latest(self):
+        """Version name of the current snapshot, or None if nothing was written yet."""
+        try:
+            with open(os.path.join(self.root, "LATEST"), "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if os.path.isdir(self._dir(version)) else None
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if not d.startswith(".") and os.path.isfile(os.path.join(self.root, d, "manifest.json")))
+
+    def write(self, frames: dict, meta: dict = None) -> str:
+        """Persist {name: DataFrame} as a new version and make it LATEST; returns the version."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = self._dir(f".write-{os.getpid()}-{threading.get_ident()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        rows = {}
+        digest = hashlib.sha1()
+        for name in sorted(frames):
+            table = _frame_to_table(frames[name])
+            path = os.path.join(tmp_dir, f"{name}.arrow")
+            feather.write_feather(table, path, compression="uncompressed")
+            rows[name] = table.num_rows
+            digest.update(name.encode())
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+
+        created = datetime.now(timezone.utc)
+        version = f"{created.strftime('%Y%m%dT%H%M%SZ')}-{digest.hexdigest()[:8]}"
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "content_hash": digest.hexdigest(),
+            "created_at": created.isoformat(),
+            "rows": rows,
+            **(meta or {}),
+        }
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        with self._lock:
+            final_dir = self._dir(version)
+            if os.path.isdir(final_dir):
+                shutil.rmtree(tmp_dir)  # same content within the same second
+            else:
+                os.replace(tmp_dir, final_dir)
+            pointer = os.path.join(self.root, "LATEST")
+            with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+                f.write(version)
+            os.replace(f"{pointer}.tmp", pointer)  # readers see the old or the new version, never half
+        return version
+
+    def read_manifest(self, version: str = None):
+        version = version or self.latest()
+        if version is None:
+            return None
+        with open(os.path.join(self._dir(version), "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read(self, version: str = None, names=None):
+        """({name: DataFrame}, manifest) for a version (default LATEST), or None if there is none."""
+        manifest = self.read_manifest(version)
+        if manifest is None:
+            return None
+        base = self._dir(manifest["version"])
+        frames = {}
+        for name in names or manifest["rows"]:
+            table = feather.read_table(os.path.join(base, f"{name}.arrow"), memory_map=True)
+            frames[name] = _table_to_frame(table)
+        return frames, manifest
+
+    def prune(self, keep: int = 5):
+        """Drop all but the newest `keep` versions (never the current one)."""
+        current = self.latest()
+        for version in self.versions()[:-keep] if keep else self.versions():
+            if version != current:
+                shutil.rmtree(self._dir(version), ignore_errors=True)
@@ -0,0 +1,247 @@
+"""
+Receiver for monday board webhooks (item created / updated / deleted, column
+value changed).
+
+monday POSTs one JSON event per change. Events are queued as they arrive and
+applied in batches by a background thread: the first event of a batch waits
+`batch_seconds` for more, so a burst of edits becomes one new snapshot rather
+than one per click. What "applying" means is up to the caller (see
+monday_to_df.apply_webhook_events); this module only speaks the webhook
+protocol:
+
+    POST /monday/webhook?token=...   {"challenge": "..."}  -> echoed back (subscription handshake)
+    POST /monday/webhook?token=...   {"event": {"type": "update_column_value", "boardId": ..., "pulseId": ...,
+                                                "columnId": ..., "columnType": ..., "value": {...}}}
+
+A failed batch is recorded and dropped: every event is also an item update on
+the board, so the next polling refresh picks the change up anyway.
+
+Events are written into the stored items as they are, so the receiver only
+listens beyond localhost with a token (compared in constant time).
+"""
+
+import hmac, json, threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PATH = "/monday/webhook"
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")  # where a receiver may run without a token
+
+DELETE_EVENTS = {"delete_pulse", "archive_pulse"}
+COLUMN_EVENTS = {"update_column_value", "change_column_value"}
+# Anything else naming an item (create_pulse, update_name, move_pulse_into_group, ...) re-reads it
+
+# Webhook column types → the API's ColumnValue.type
+WEBHOOK_TYPES = {
+    "numeric": "numbers", "color": "status", "board-relation": "board_relation",
+    "boolean": "checkbox", "long-text": "long_text",
+}
+
+
+def parse_event(payload: dict):
+    """
+    Normalise one webhook body to {"kind": "delete" | "column" | "item", "type",
+    "board_id", "item_id", "column_id", "column_type", "value", "changed_at"},
+    or None if it doesn't concern an item.
+    """
+    event = payload.get("event") or {}
+    item_id, board_id = event.get("pulseId") or event.get("itemId"), event.get("boardId")
+    if not item_id or not board_id:
+        return None
+    kind = event.get("type")
+    if kind in DELETE_EVENTS:
+        kind = "delete"
+    elif kind in COLUMN_EVENTS and event.get("columnId"):
+        kind = "column"
+    else:
+        kind = "item"
+    changed_at = event.get("changedAt") or event.get("triggerTime")
+    if isinstance(changed_at, (int, float)):
+        changed_at = datetime.fromtimestamp(changed_at, timezone.utc).isoformat()
+    return {
+        "kind": kind,
+        "type": event.get("type"),
+        "board_id": int(board_id),
+        "item_id": str(int(item_id)),
+        "column_id": event.get("columnId"),
+        "column_type": event.get("columnType"),
+        "value": event.get("value"),
+        "changed_at": changed_at,
+    }
+
+
+def column_value(column_id: str, column_type: str, value):
+    """
+    A webhook column value in the shape items_page returns it (the Cols
+    fragment in monday_to_df), or None for a type we don't translate (the item
+    is then re-read instead).
+    """
+    kind = WEBHOOK_TYPES.get(column_type, column_type)
+    v = value if isinstance(value, dict) else {}
+    cv = {"id": column_id, "type": kind}
+    if kind == "numbers":
+        raw = v.get("value")
+        try:
+            number = float(raw) if raw not in (None, "") else None
+        except (TypeError, ValueError):
+            number = None
+        return {**cv, "text": "" if number is None else str(raw), "number": number}
+    if kind in ("text", "long_text"):
+        return {**cv, "text": v.get("value", v.get("text")) or ""}
+    if kind == "status":
+        label = v.get("label") or {}
+        return {**cv, "text": label.get("text") or "", "index": label.get("index")}
+    if kind == "dropdown":
+        names = [c.get("name") for c in v.get("chosenValues") or []]
+        return {**cv, "text": ", ".join(n for n in names if n)}
+    if kind == "board_relation":
+        ids = [str(p["linkedPulseId"]) for p in v.get("linkedPulseIds") or [] if p.get("linkedPulseId")]
+        return {**cv, "text": None, "linked_item_ids": ids}  # text holds item names, which the event doesn't carry
+    if kind == "email":
+        return {**cv, "text": v.get("text") or v.get("email") or "", "email": v.get("email")}
+    if kind == "phone":
+        return {**cv, "text": v.get("phone") or "", "phone": v.get("phone"),
+                "country_short_name": v.get("countryShortName")}
+    if kind == "checkbox":
+        return {**cv, "text": "v" if str(v.get("checked")).lower() == "true" else ""}
+    if kind == "date":
+        return {**cv, "text": " ".join(x for x in (v.get("date"), v.get("time")) if x)}
+    return None
+
+
+class WebhookReceiver:
+    def __init__(self, apply_fn, boards=None, batch_seconds: float = 5.0, token: str = None,
+                 record_path: str = None, name: str = "webhook-applier"):
+        self.apply_fn = apply_fn        # apply_fn(events) -> anything (kept as last_result)
+        self.boards = boards            # board ids to accept (None = all)
+        self.batch_seconds = batch_seconds
+        self.token = token              # if set, required as ?token=... on the webhook URL
+        self.record_path = record_path  # if set, every body is appended here as a JSON line
+        self.name = name
+        self._queue = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._apply_lock = threading.Lock()
+        self._thread = None
+        self._server = None
+        self._status = {
+            "received": 0,
+            "ignored": 0,
+            "applied": 0,
+            "batches": 0,
+            "failures": 0,
+            "last_applied": None,
+            "last_error": None,
+            "last_result": None,
+        }
+
+    # --- intake ---------------------------------------------------------------
+
+    def handle(self, payload: dict, token: str = None):
+        """Process one POST body; returns (HTTP status, response dict)."""
+        if self.token and not hmac.compare_digest((token or "").encode(), self.token.encode()):
+            return 403, {"error": "bad token"}
+        if "challenge" in payload:
+            return 200, {"challenge": payload["challenge"]}
+        if self.record_path:
+            with self._lock, open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload) + "\n")
+        event = parse_event(payload)
+        with self._lock:
+            if event is None or (self.boards is not None and event["board_id"] not in self.boards):
+                self._status["ignored"] += 1
+                return 200, {}
+            self._status["received"] += 1
+            self._queue.append(event)
+        self._wake.set()
+        return 200, {}
+
+    def status(self) -> dict:
+        with self._lock:
+            return {**self._status, "queued": len(self._queue)}
+
+    # --- applying -------------------------------------------------------------
+
+    def flush(self):
+        """Apply everything queued so far, now (the background thread does this on its own)."""
+        with self._apply_lock:
+            with self._lock:
+                events, self._queue = self._queue, []
+            if not events:
+                return None
+            try:
+                result = self.apply_fn(events)
+            except Exception as e:
+                with self._lock:
+                    self._status["failures"] += 1
+                    self._status["last_error"] = f"{type(e).__name__}: {e}"
+                return None
+            with self._lock:
+                self._status["applied"] += len(events)
+                self._status["batches"] += 1
+                self._status["last_applied"] = datetime.now(timezone.utc).isoformat()
+                self._status["last_error"] = None
+                self._status["last_result"] = result
+            return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.wait(self.batch_seconds):  # let the rest of the burst arrive
+                break
+            self.flush()
+
+    # --- HTTP -----------------------------------------------------------------
+
+    def start(self, port: int, host: str = "0.0.0.0"):
+        """Serve the webhook endpoint and start applying batches, both on daemon threads."""
+        if not self.token and host not in LOCAL_HOSTS:
+            raise ValueError(f"a webhook receiver listening on {host} needs a token")
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path != PATH:
+                    self.send_error(404)
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                except ValueError:
+                    self.send_error(400)
+                    return
+                status, out = receiver.handle(payload, token=(parse_qs(url.query).get("token") or [None])[0])
+                body = json.dumps(out).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="webhook-http", daemon=True).start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{PATH}"
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        if self._server is not None:
+            self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()